@@ -1,9 +1,13 @@
-import bpy, math
+import bpy, bgl, bmesh, math, os, csv, json, time
+
+from array import array
 
 from bpy.types import Panel, Operator
-from mathutils import Vector
-from enum import Enum
-from bpy_extras import view3d_utils
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
+from mathutils import Vector, kdtree
+
+# only needed once something is drawn, see importHelpers()
+np = shapes = None
 
 bl_info = \
     {
@@ -29,6 +33,17 @@ bl_info = \
 #            N.z = 0
 #            o = self._last_point    
 
+def importHelpers():
+    """Import numpy and the shape kernel on first use
+
+    Keeps enabling the add-on, and starting Blender with it, free of the
+    numpy import. Every public entry point that needs them calls this
+    first, it costs a global lookup once they are imported."""
+    global np, shapes
+    if np is None:
+        import numpy as np
+        import InteractiveDrawShapes as shapes
+
 def rayPlaneIntersection(P0, V, o, N):
     if V.dot(N) == 0:
         return None
@@ -36,705 +51,1837 @@ def rayPlaneIntersection(P0, V, o, N):
     d = (o - P0).dot(N) / (V.dot(N))
     return d * V + P0
 
+def fillMesh(mesh, arrays):
+    """Fill an empty mesh from the arrays of shapes.meshArrays() in bulk
+
+    Sizes the vertex, loop and polygon arrays once with add() and fills
+    them with foreach_set, so no Python object is created per element."""
+    co, vertex_index, loop_start, loop_total, uvs = arrays
+
+    mesh.vertices.add(len(co) // 3)
+    mesh.vertices.foreach_set("co", co)
+    mesh.loops.add(len(vertex_index))
+    mesh.loops.foreach_set("vertex_index", vertex_index)
+    mesh.polygons.add(len(loop_start))
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    mesh.polygons.foreach_set("loop_total", loop_total)
+
+    if uvs is not None:
+        mesh.uv_textures.new()
+        mesh.uv_layers.active.data.foreach_set("uv", uvs)
+
+    mesh.update(calc_edges=True)
+
+def meshFromArrays(mesh, verts, faces, uvs=None):
+    """Fill an empty mesh from vertex and face lists"""
+    importHelpers()
+    fillMesh(mesh, shapes.meshArrays(verts, faces, uvs))
+
+# worker thread for the numpy side of building meshes
+_executor = None
+
+def submitJob(fn, *args):
+    """Run fn in the background, returns its Future"""
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=1)
+    return _executor.submit(fn, *args)
+
+class IDT_view_projection:
+    """Unprojection basis of a 3d view, valid until the view changes
+
+    Folds the inverse perspective matrix into per-axis vectors so that
+    projecting a region coordinate is a couple of multiply-adds instead of
+    the matrix inversions done by view3d_utils on every call."""
+
+    def __init__(self, region, rv3d):
+        self.width  = region.width
+        self.height = region.height
+        self.view_matrix = rv3d.view_matrix.copy()
+        self.view_perspective = rv3d.view_perspective
+        self.is_perspective = rv3d.is_perspective
+
+        persinv = rv3d.perspective_matrix.inverted()
+        viewinv = self.view_matrix.inverted()
+
+        self.forward = -viewinv.col[2].xyz.normalized()
+        self.up = viewinv.col[1].xyz.normalized()
+
+        self._x = persinv.col[0].xyz
+        self._y = persinv.col[1].xyz
+
+        if self.is_perspective:
+            # view3d_utils unprojects (dx, dy, -0.5) and divides by w
+            self._c = persinv.translation - 0.5 * persinv.col[2].xyz
+            self._wx = persinv[3][0]
+            self._wy = persinv[3][1]
+            self._wc = persinv[3][3] - 0.5 * persinv[3][2]
+            self.origin = viewinv.translation.copy()
+        else:
+            self._c = persinv.translation.copy()
+            if self.view_perspective != 'CAMERA':
+                # this value is scaled to the far clip already
+                self._c -= persinv.col[2].xyz
+            self.vector = self.forward
+
+    def matches(self, region, rv3d):
+        return (region.width == self.width and region.height == self.height and
+                rv3d.view_perspective == self.view_perspective and
+                rv3d.view_matrix == self.view_matrix)
+
+    def ray(self, coord):
+        """Returns the ray origin and direction through a region coordinate"""
+        dx = (2.0 * coord[0] / self.width) - 1.0
+        dy = (2.0 * coord[1] / self.height) - 1.0
+
+        p = self._x * dx + self._y * dy + self._c
+
+        if self.is_perspective:
+            w = self._wx * dx + self._wy * dy + self._wc
+            return self.origin.copy(), (p / w - self.origin).normalized()
+
+        return p, self.vector.copy()
+
+    def planeAffine(self, o, N):
+        """Map of an orthographic view onto the plane through o with normal N
+
+        Returns vectors A, B and C so that the point of the plane under the
+        region coordinate (x, y) is A * x + B * y + C, or None when the view
+        looks along the plane."""
+        V = self.vector
+        d = V.dot(N)
+        if d == 0:
+            return None
+
+        # slide a point along the view onto the plane through the origin
+        def project(p):
+            return p - V * (p.dot(N) / d)
+
+        A = project(self._x) * (2.0 / self.width)
+        B = project(self._y) * (2.0 / self.height)
+        C = project(self._c - self._x - self._y) + V * (o.dot(N) / d)
+        return A, B, C
+
+class IDT_click_buffer:
+    """Clicked points of a shape followed by the live cursor point
+
+    All points live in one contiguous array('d') of xyz rows: the clicks
+    first, then the cursor. Placing a click only moves the row the cursor
+    is written to, the buffer is swapped for one twice the size when a
+    shape takes more clicks.
+
+    This only saves rebuilding the list of clicks on every move. The ray
+    cast still returns a new Vector, and the shape is built from a plane
+    space copy of the points into new arrays."""
+    __slots__ = ('_data', 'count')
+
+    def __init__(self, capacity=4):
+        importHelpers()
+        self._data = array('d', [0.0]) * (3 * (capacity + 1))
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def setCursor(self, point):
+        i = 3 * self.count
+        data = self._data
+        data[i]     = point[0]
+        data[i + 1] = point[1]
+        data[i + 2] = point[2]
+
+    def push(self):
+        """Keep the cursor as the next click"""
+        i = 3 * self.count
+        self.count += 1
+
+        if i + 6 > len(self._data):
+            # a view from points() pins the array, extending it in place
+            # would raise BufferError
+            data = array('d', [0.0]) * (2 * len(self._data))
+            data[:len(self._data)] = self._data
+            self._data = data
+
+        # the cursor stays where the click is until it moves
+        self._data[i + 3:i + 6] = self._data[i:i + 3]
+
+    def clear(self):
+        """Drop the clicks, keep the cursor"""
+        i = 3 * self.count
+        self._data[0:3] = self._data[i:i + 3]
+        self.count = 0
+
+    def last(self):
+        """The last click"""
+        i = 3 * self.count
+        return self._data[i - 3:i]
+
+    def points(self):
+        """(count + 1, 3) array of the clicks and the cursor, a view of
+        the buffer rather than a copy
+
+        The view follows the cursor until the buffer grows, from then on
+        it keeps the points it had. Mapping it to plane space copies it."""
+        n = self.count + 1
+        return np.frombuffer(memoryview(self._data)[:3 * n], dtype=np.float64).reshape(n, 3)
+
+# plane axes of the axis aligned working planes, the normal is their cross
+AXIS_PLANES = {
+    0 : ((0,1,0), (0,0,1)),
+    1 : ((1,0,0), (0,0,1)),
+    2 : ((1,0,0), (0,1,0)),
+}
+
+class IDT_working_plane:
+    """Drawing plane with a precomputed orthonormal basis
+
+    Shapes are built in plane space, x and y on the plane and z along the
+    normal, and moved into the world with a single matrix multiply."""
+
+    def __init__(self, origin, u, v):
+        importHelpers()
+        self.origin = Vector(origin)
+        self.u      = Vector(u).normalized()
+        self.normal = self.u.cross(Vector(v)).normalized()
+        self.v      = self.normal.cross(self.u)
+
+        # rows are the plane axes, local.dot(basis) + origin is in world space
+        self._basis  = np.array((self.u, self.v, self.normal))
+        self._origin = np.array(self.origin)
+
+    @staticmethod
+    def fromAxis(axis, origin=(0,0,0)):
+        u, v = AXIS_PLANES[axis]
+        return IDT_working_plane(origin, u, v)
+
+    @staticmethod
+    def fromView(view, origin=(0,0,0)):
+        viewinv = view.view_matrix.to_3x3().transposed()
+        return IDT_working_plane(origin, viewinv.col[0], viewinv.col[1])
+
+    @staticmethod
+    def fromActiveFace(obj):
+        """Plane of the active face of a mesh object, None without one"""
+        if obj is None or obj.type != 'MESH':
+            return None
+
+        if obj.mode == 'EDIT':
+            face = bmesh.from_edit_mesh(obj.data).faces.active
+            if face is None:
+                return None
+            center = face.calc_center_median()
+            edge = face.verts[1].co - face.verts[0].co
+        else:
+            mesh = obj.data
+            if not 0 <= mesh.polygons.active < len(mesh.polygons):
+                return None
+            face = mesh.polygons[mesh.polygons.active]
+            center = face.center
+            edge = mesh.vertices[face.vertices[1]].co - mesh.vertices[face.vertices[0]].co
+
+        matrix = obj.matrix_world
+        normal = matrix.inverted().transposed().to_3x3() * face.normal
+        u = matrix.to_3x3() * edge
+
+        return IDT_working_plane(matrix * center, u, normal.cross(u))
+
+    def lift(self, origin, forward):
+        """Origin and normal of the plane standing upright on this one
+        through origin, turned towards the view"""
+        N = forward - self.normal * forward.dot(self.normal)
+        if N.length < 1e-6:
+            # looking straight down at the plane, any upright plane will do
+            N = self.v
+        return Vector(origin), N.normalized()
+
+    def toPlane(self, points):
+        """Plane space coordinates of world space points"""
+        return (np.asarray(points, dtype=np.float64) - self._origin).dot(self._basis.T)
+
+    def toWorld(self, points):
+        """World space coordinates of plane space points"""
+        return np.asarray(points, dtype=np.float64).dot(self._basis) + self._origin
+
+# times every mesh changed by pointer, counted by countMeshChanges()
+_mesh_changes = {}
+
+# draw operators running modal, they report the meshes they change
+# themselves so their updates are not counted twice
+_drawing = set()
+
+def meshChanged(mesh):
+    key = mesh.as_pointer()
+    _mesh_changes[key] = _mesh_changes.get(key, 0) + 1
+
+@bpy.app.handlers.persistent
+def countMeshChanges(scene):
+    """Count the changes of every mesh after a scene update
+
+    Gives the snap index a per mesh change signal, so it never reads back
+    coordinates to find out whether a tree is still valid. Only walks the
+    meshes when one of them changed, and leaves out the ones a running
+    draw operator reports itself."""
+    if not bpy.data.meshes.is_updated:
+        return
+
+    drawn = set(op._mesh_data.as_pointer() for op in _drawing if op._mesh_data is not None)
+
+    for mesh in bpy.data.meshes:
+        if mesh.is_updated and mesh.as_pointer() not in drawn:
+            meshChanged(mesh)
+
+@bpy.app.handlers.persistent
+def forgetSessions(scene):
+    """A loaded file has none of the meshes and objects the sessions
+    know, and no draw operator running"""
+    _sessions.clear()
+    _mesh_changes.clear()
+    _drawing.clear()
+
+class IDT_snap_index:
+    """Vertex snapping index over the visible mesh objects of a scene
+
+    Keeps one KD-tree per mesh in object space, so moving an object only
+    refreshes its matrix. Trees are built when the index is updated and
+    rebuilt once their mesh changed, a snap never builds one. Objects are
+    grouped by the size of their bounding sphere, a KD-tree over the
+    sphere centers of each group finds those within reach of a point
+    without visiting the others. A large object only widens the reach of
+    its own group."""
+
+    def __init__(self):
+        self._trees   = {}
+        self._spheres = {}
+        self._groups  = []
+
+    def update(self, scene):
+        spheres = {}
+        objects = []
+        changed = False
+
+        for obj in scene.objects:
+            if obj.type != 'MESH' or not obj.is_visible(scene):
+                continue
+
+            mesh  = obj.data
+            count = len(mesh.vertices)
+            if count == 0:
+                continue
+
+            key = mesh.as_pointer()
+            signature = key, count, _mesh_changes.get(key, 0)
+
+            entry = self._spheres.get(obj.as_pointer())
+            if entry is None or entry[0] != signature or entry[1] != obj.matrix_world:
+                # bounding sphere to skip objects that are out of reach
+                matrix = obj.matrix_world.copy()
+                corners = [matrix * Vector(c) for c in obj.bound_box]
+                center = sum(corners, Vector()) / 8
+                radius = max((c - center).length for c in corners)
+                entry = signature, matrix, matrix.inverted(), center, radius
+                changed = True
+
+            spheres[obj.as_pointer()] = entry
+            objects.append((entry, mesh))
+
+        if not changed and spheres.keys() == self._spheres.keys():
+            return
+
+        # build the stale trees now rather than while the cursor moves, and
+        # drop those of meshes that left the scene
+        trees = {}
+        sizes = {}
+        for entry, mesh in objects:
+            signature = entry[0]
+            if signature[0] not in trees:
+                trees[signature[0]] = self.tree(signature, mesh)
+
+            # spheres of about the same size share a group
+            sizes.setdefault(math.frexp(entry[4])[1], []).append(entry)
+
+        groups = []
+        for size, entries in sorted(sizes.items()):
+            centers = kdtree.KDTree(len(entries))
+            for i, entry in enumerate(entries):
+                centers.insert(entry[3], i)
+            centers.balance()
+            groups.append((centers, max(entry[4] for entry in entries), entries))
+
+        self._trees   = trees
+        self._spheres = spheres
+        self._groups  = groups
+
+    def tree(self, signature, mesh):
+        """Signature and KD-tree of the vertices of mesh, rebuilt when the
+        mesh changed"""
+        entry = self._trees.get(signature[0])
+        if entry is not None and entry[0] == signature:
+            return entry
+
+        count = signature[1]
+        co = array('f', [0.0]) * (count * 3)
+        mesh.vertices.foreach_get("co", co)
+
+        tree = kdtree.KDTree(count)
+        for i in range(count):
+            tree.insert(co[i * 3:i * 3 + 3], i)
+        tree.balance()
+        return signature, tree
+
+    def snap(self, point, distance):
+        """Nearest vertex within distance of point, or None"""
+        best = None
+
+        for centers, reach, entries in self._groups:
+            for c, i, d in centers.find_range(point, distance + reach):
+                signature, matrix, inverse, center, radius = entries[i]
+                if d - radius > distance:
+                    continue
+
+                co, index, dist = self._trees[signature[0]][1].find(inverse * point)
+                if co is None:
+                    continue
+
+                co = matrix * co
+                dist = (co - point).length
+                if dist <= distance:
+                    best, distance = co, dist
+
+        return best
+
+class IDT_draw_session:
+    """State shared by the draw operators of a window between invocations
+
+    Keeps the view projection, the snap index, the last face plane drawn
+    on, the names of the selected objects and a pool of unlinked shape
+    objects, so drawing many shapes in a row reuses warm structures
+    instead of rebuilding them every time."""
+
+    def __init__(self):
+        self.view = None
+        self.snap_index = IDT_snap_index()
+        self.plane = None
+        self.selected = None
+        self._pool = {}
+
+    @staticmethod
+    def get(context):
+        key = context.window.as_pointer()
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = IDT_draw_session()
+        return session
+
+    def acquire(self, kind):
+        """Pooled object for a shape of this kind, or None"""
+        names = self._pool.get(kind)
+        while names:
+            # look the object up again, undo may have replaced it
+            obj = bpy.data.objects.get(names.pop())
+            if obj is not None and obj.users == 0:
+                return obj
+        return None
+
+    def release(self, kind, obj):
+        """Hand an unlinked object back to the pool"""
+        self._pool.setdefault(kind, []).append(obj.name)
+
+    def pooled(self, kind):
+        return len(self._pool.get(kind, ()))
+
+    def selectOnly(self, context, obj):
+        """Make obj the only selected object and the active one
+
+        Only deselects the active object and those the session selected,
+        select_all and selected_objects both walk every object in the
+        scene. The first shape of a session learns the selection once."""
+        if self.selected is None:
+            self.selected = [selected.name for selected in context.selected_objects]
+
+        active = context.scene.objects.active
+        if active is not None:
+            active.select = False
+
+        for name in self.selected:
+            # look the object up again, undo may have replaced it
+            selected = bpy.data.objects.get(name)
+            if selected is not None:
+                selected.select = False
+
+        obj.select = True
+        context.scene.objects.active = obj
+        self.selected = [obj.name]
+
+# draw sessions by window
+_sessions = {}
+
+class IDT_profiler:
+    """Rolling timings of the modal loop of the draw operators
+
+    Off by default. Enabling it wraps the timed methods of the operators,
+    so the disabled operators run exactly as without it. A sample is the
+    time spent in its stage only: time spent in a nested stage is
+    subtracted, and a method called from within its own stage is part of
+    the outer sample. Every stage keeps its samples in a preallocated ring
+    buffer, recording a sample never allocates."""
+
+    stages = ('ray', 'write', 'update')
+
+    def __init__(self, size=1024, clock=time.perf_counter):
+        self.size     = size
+        self.clock    = clock
+        self.enabled  = False
+        self._samples = {}
+        self._count   = {}
+        self._wrapped = []
+
+        # stages being timed and the time spent in stages nested in them
+        self._open   = set()
+        self._nested = 0.0
+        self.reset()
+
+    def reset(self):
+        for stage in self.stages:
+            self._samples[stage] = array('d', [0.0]) * self.size
+            self._count[stage] = 0
+
+    def record(self, stage, seconds):
+        count = self._count[stage]
+        self._samples[stage][count % self.size] = seconds
+        self._count[stage] = count + 1
+
+    def timed(self, stage, method):
+        record  = self.record
+        clock   = self.clock
+        running = self._open
+
+        def timed(*args):
+            if stage in running:
+                # an override calling its base, the outer call times both
+                return method(*args)
+
+            running.add(stage)
+            nested = self._nested
+            self._nested = 0.0
+            start = clock()
+            try:
+                return method(*args)
+            finally:
+                elapsed = clock() - start
+                record(stage, elapsed - self._nested)
+                self._nested = nested + elapsed
+                running.discard(stage)
+
+        return timed
+
+    def enable(self, methods):
+        """Wrap the methods of (stage, class, method name) entries"""
+        if self.enabled:
+            return
+
+        for stage, cls, name in methods:
+            method = cls.__dict__[name]
+            setattr(cls, name, self.timed(stage, method))
+            self._wrapped.append((cls, name, method))
+
+        self.enabled = True
+
+    def disable(self):
+        for cls, name, method in self._wrapped:
+            setattr(cls, name, method)
+
+        self._wrapped = []
+        self.enabled = False
+
+    def percentile(self, stage, p):
+        """Percentile of the samples in the buffer in milliseconds"""
+        n = min(self._count[stage], self.size)
+        if n == 0:
+            return 0.0
+
+        samples = sorted(self._samples[stage][:n])
+        return samples[min(n - 1, int(n * p / 100))] * 1000
+
+    def stats(self):
+        return dict((stage, {
+            'count' : self._count[stage],
+            'p50'   : self.percentile(stage, 50),
+            'p95'   : self.percentile(stage, 95),
+            'p99'   : self.percentile(stage, 99),
+        }) for stage in self.stages)
+
+    def dump(self, filepath):
+        with open(filepath, 'w') as f:
+            json.dump(self.stats(), f, indent=2, sort_keys=True)
+
+# timings of all draw operators, also in the driver namespace as idt_profile
+_profile = IDT_profiler()
+
 class IDT_draw_prototype:
     """Prototype for all interactive draw functions"""
-    _click_number = 0
-    
-    def mousePlaneIntersection(self, context, event, o, N):
-        scene  = context.scene
-        region = context.region
-        rv3d   = context.region_data
-        coord  = event.mouse_region_x, event.mouse_region_y
-        
-        view_vector = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
-        ray_origin  = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
+    # the geometry is only pushed to the undo stack once a shape is done,
+    # cancelling leaves no step behind
+    bl_options = {'REGISTER', 'UNDO'}
 
-        if rv3d.view_perspective != 'ORTHO':
-            return rayPlaneIntersection(ray_origin, view_vector, o, N), view_vector
+    _shape         = None
+    _click_number  = 0
+    _max_clicks    = 0
+    _clicks        = None
+    _last_point    = None
+    _shapes_done   = 0
+    _repeatable    = False
+    _curve_path    = None
+    _mesh_data     = None
+    _cyclic        = True
+    _lift_click    = None
 
-        if abs(view_vector.y) == 1:
-            ray_origin.y = 0
-        elif abs(view_vector.x) == 1:
-            ray_origin.x = 0
-        elif abs(view_vector.z) == 1:
-            ray_origin.z = 0
-                    
-        return ray_origin, view_vector
+    # only the parametric shapes have a segments property
+    segments = 0
 
-############################
-# Line Draw Functions
-############################
+    use_overlay = BoolProperty(
+        name="Overlay Preview",
+        description="Draw the shape as a viewport overlay and only create "
+                    "the object once it is finished",
+        default=False
+    )
+
+    use_snap = BoolProperty(
+        name="Snap to Vertices",
+        description="Snap points to vertices of the visible meshes",
+        default=False
+    )
+    snap_distance = FloatProperty(
+        name="Snap Distance",
+        description="Largest distance a point is moved to snap to a vertex",
+        default=0.25,
+        min=0.0,
+        subtype='DISTANCE'
+    )
+
+    working_plane = EnumProperty(
+        name="Plane",
+        description="Plane the shape is drawn on",
+        items=(
+            ('GROUND', "Ground", "Axis plane facing the view through the world origin"),
+            ('CURSOR', "3D Cursor", "Axis plane facing the view through the 3D cursor"),
+            ('VIEW', "View", "Plane facing the view through the 3D cursor"),
+            ('FACE', "Active Face", "Plane of the active face of the active mesh"),
+        ),
+        default='GROUND'
+    )
+
+    # plane of the shape and the view it was turned to
+    _plane      = None
+    _plane_view = None
+
+    # view, plane origin and normal, and the orthographic region to plane map
+    _plane_affine = None
+
+    # overlay preview state
+    _area           = None
+    _draw_handler   = None
+    _preview_points = None
+
+    # MOUSEMOVE events only buffer the cursor position, the timer applies
+    # it to the geometry at most once per refresh
+    _refresh_rate  = 1 / 60
+    _timer         = None
+    _pending_coord = None
+
+    # per window state that outlives the operator
+    _session = None
 
-class IDT_draw_line(IDT_draw_prototype, Operator):
-    """interactively draw a line"""
-    bl_idname = "curve.idt_draw_line"
-    bl_label = "Draw Line"
-    
-    _first_point = None
-    _last_point  = None
-    _curve       = None
-    _curve_data  = None
-    _curve_path  = None
-    
     def modal(self, context, event):
-        if event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
+        if self.wheel(context, event):
+            # the tool used the event, do not navigate
+            return {'RUNNING_MODAL'}
+        elif event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
             # allow navagation
+            self._session.view = None
             return {'PASS_THROUGH'}
+        elif event.type == 'TIMER':
+            self.flushMousemove(context)
         elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
+            # make sure the click lands where the cursor actually is
+            self.flushMousemove(context)
             self.leftmouse(context, event)
         elif event.type == 'MOUSEMOVE':
-            self.mousemove(context, event)
+            self._pending_coord = event.mouse_region_x, event.mouse_region_y
         elif event.type in {'RIGHTMOUSE', 'ESC'}:
+            self.stopModal(context)
+
+            if self._shapes_done:
+                # keep the shapes of a continuous draw, drop the open one;
+                # each shape already has its undo step, do not push another
+                self.discardShape(context)
+                return {'CANCELLED'}
+
             self.cleanup(context)
             return {'CANCELLED'}
-        
-        if self._click_number == 2:
+
+        if self.shapeDone():
+            self.finishShape(context)
+
+            if self.working_plane == 'FACE':
+                # the new object becomes active and has no active face,
+                # the next shape goes on the same face
+                self._session.plane = self._plane
+
+            if self._repeatable and self.use_repeat:
+                # one undo step per shape of a continuous draw
+                bpy.ops.ed.undo_push(message=self.bl_label)
+                self.nextShape(context)
+                return {'RUNNING_MODAL'}
+
+            self.stopModal(context)
             return {"FINISHED"}
-        
+
         return {'RUNNING_MODAL'}
-    
+
     def invoke(self, context, event):
         if context.space_data.type == 'VIEW_3D':
-            context.window_manager.modal_handler_add(self)
-            
-            if context.mode == 'EDIT_CURVE':
-                self._curve = context.object
-                self._curve_data = self._curve.data
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(1)
-                self._curve_path.use_cyclic_u = True
-                self._curve_data.splines.active = self._curve_path
-            else:
-                self._curve_data = bpy.data.curves.new(name='Triangle', type='CURVE')
-                self._curve_data.dimensions = '3D'
-                
-                self._curve = bpy.data.objects.new('Triangle', self._curve_data)
-                self._curve.location = (0,0,0)
-                bpy.context.scene.objects.link(self._curve)
-                bpy.ops.object.select_all(action="DESELECT")
-                self._curve.select = True
-                context.scene.objects.active = self._curve
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(1)
-                self._curve_path.use_cyclic_u = True
+            importHelpers()
+            self._session = IDT_draw_session.get(context)
+            self._clicks = IDT_click_buffer(self._max_clicks)
+            self._shapes_done = 0
+
+            self._plane = self.initialPlane(context)
+            if self._plane is None:
+                self.report({'WARNING'}, "The active object has no active face")
+                return {'CANCELLED'}
+
+            self.startModal(context)
+
+            if self.use_snap:
+                self._session.snap_index.update(context.scene)
+
+            if not self.use_overlay:
+                self.createData(context)
 
             return {'RUNNING_MODAL'}
         else:
             self.report({'WARNING'}, "Active space must be a View3d")
             return {'CANCELLED'}
-        
-    def cleanup(self, context):
-        if self._curve is not None:
-            if context.mode == 'EDIT_CURVE':
-                self._curve_data.splines.remove(self._curve_path)
-            else:
-                bpy.context.scene.objects.unlink(self._curve)
-                bpy.data.objects.remove(self._curve)
-                bpy.data.curves.remove(self._curve_data)
-        
+
+    def shapeDone(self):
+        return self._click_number == self._max_clicks
+
+    def startModal(self, context):
+        _drawing.add(self)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(self._refresh_rate, context.window)
+        wm.modal_handler_add(self)
+
+        if self.use_overlay:
+            self._area = context.area
+            self._draw_handler = bpy.types.SpaceView3D.draw_handler_add(
+                self.drawOverlay, (context,), 'WINDOW', 'POST_VIEW')
+
+    def stopModal(self, context):
+        _drawing.discard(self)
+        if self._mesh_data is not None:
+            meshChanged(self._mesh_data)
+
+        if self._timer is not None:
+            context.window_manager.event_timer_remove(self._timer)
+            self._timer = None
+
+        if self._draw_handler is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(self._draw_handler, 'WINDOW')
+            self._draw_handler = None
+            self._area.tag_redraw()
+
+    def flushMousemove(self, context):
+        coord = self._pending_coord
+        if coord is None:
+            return
+
+        self._pending_coord = None
+        self.mousemove(context, coord)
+
+    def finishShape(self, context):
+        self._shapes_done += 1
+
+        if self.use_overlay:
+            # the preview was never in the scene, build it in one go
+            self.createData(context)
+            if self._preview_points is not None:
+                self.writeGeometry(self._preview_points)
+
+    def commitGeometry(self, points):
+        """Update the preview of the shape with every point"""
+        if self._draw_handler is not None:
+            self._preview_points = points
+            self._area.tag_redraw()
+        else:
+            self.writeGeometry(points)
+
+    def writeGeometry(self, points):
+        """Write every point of the shape in one bulk call"""
+        if self._curve_path is not None:
+            self._curve_path.points.foreach_set("co", shapes.pointBuffer(points, 4))
+        else:
+            self._mesh_data.vertices.foreach_set("co", shapes.pointBuffer(points, 3))
+
+        self.tagUpdate()
+
+    def tagUpdate(self):
+        """Let Blender know the geometry changed"""
+        if self._curve_path is not None:
+            self._curve_data.update_tag()
+        else:
+            self._mesh_data.update()
+
+    def drawOverlay(self, context):
+        points = self._preview_points
+        if points is None:
+            return
+
+        loops = self.overlayLoops(len(points))
+        mode = bgl.GL_LINE_LOOP if self._cyclic else bgl.GL_LINE_STRIP
+
+        bgl.glEnable(bgl.GL_BLEND)
+        bgl.glColor4f(1.0, 0.6, 0.0, 1.0)
+        bgl.glLineWidth(2)
+
+        for loop in loops:
+            bgl.glBegin(mode)
+            for i in loop:
+                p = points[i]
+                bgl.glVertex3f(p[0], p[1], p[2])
+            bgl.glEnd()
+
+        # restore opengl defaults
+        bgl.glLineWidth(1)
+        bgl.glDisable(bgl.GL_BLEND)
+        bgl.glColor4f(0.0, 0.0, 0.0, 1.0)
+
+    def viewProjection(self, context):
+        region = context.region
+        rv3d   = context.region_data
+
+        view = self._session.view
+        if view is None or not view.matches(region, rv3d):
+            view = self._session.view = IDT_view_projection(region, rv3d)
+
+        return view
+
+    def mousePlaneIntersection(self, context, coord, o, N):
+        view = self.viewProjection(context)
+
+        if view.is_perspective:
+            ray_origin, view_vector = view.ray(coord)
+            return rayPlaneIntersection(ray_origin, view_vector, o, N)
+
+        # orthographic views map the region onto the plane affinely, the
+        # map only changes with the view or the plane
+        cached = self._plane_affine
+        if cached is None or cached[0] is not view or cached[1] != o or cached[2] != N:
+            cached = self._plane_affine = view, o.copy(), N.copy(), view.planeAffine(o, N)
+
+        affine = cached[3]
+        if affine is None:
+            return None
+
+        A, B, C = affine
+        return A * coord[0] + B * coord[1] + C
+
+    def linkObject(self, context, obj):
+        context.scene.objects.link(obj)
+        self._session.selectOnly(context, obj)
+
+    def pointCount(self):
+        return shapes.shapePointCount(self._shape, self.segments)
+
+    def poolKey(self):
+        # pooled objects only fit shapes with the same topology
+        return self._shape, self.segments
+
+    def shapeFaces(self):
+        return None
+
+    def overlayLoops(self, count):
+        # curves are a single path, meshes outline every face
+        faces = self.shapeFaces()
+        if faces is None:
+            return [range(count)]
+        return faces
+
+    def wheel(self, context, event):
+        """Handle a wheel event, False lets it navigate the view"""
+        return False
+
+    def initialPlane(self, context):
+        if self.working_plane == 'FACE':
+            return IDT_working_plane.fromActiveFace(context.active_object) or self._session.plane
+        elif self.working_plane == 'GROUND':
+            return IDT_working_plane.fromAxis(2)
+
+        return IDT_working_plane.fromAxis(2, context.scene.cursor_location)
+
+    def followView(self, context):
+        """Turn the plane with the view until the first click"""
+        view = self.viewProjection(context)
+        if view is self._plane_view:
+            return
+
+        self._plane_view = view
+        origin = self._plane.origin
+
+        if self.working_plane == 'VIEW':
+            self._plane = IDT_working_plane.fromView(view, origin)
+        elif self.working_plane != 'FACE':
+            self._plane = IDT_working_plane.fromAxis(shapes.viewAxis(view.forward), origin)
+
+    def workingPlane(self, context):
+        """Origin and normal of the plane the cursor is projected on"""
+        if self._click_number == self._lift_click:
+            # raise the top on a plane standing upright on the base
+            forward = self.viewProjection(context).forward
+            return self._plane.lift(self._clicks.last(), forward)
+
+        return self._plane.origin, self._plane.normal
+
+    def liftPoint(self, context, coord):
+        """Point above the last click under the cursor
+
+        Looking along the upright plane, as in the orthographic axis views,
+        the cursor can not be projected onto it. The top then follows the
+        cursor along the normal of the base as it shows on the screen."""
+        o, N = self.workingPlane(context)
+        view = self.viewProjection(context)
+        if abs(view.forward.dot(N)) > 1e-3:
+            return self.mousePlaneIntersection(context, coord, o, N)
+
+        ray_origin, ray_vector = view.ray(coord)
+        offset = ray_origin - o
+        offset -= ray_vector * offset.dot(ray_vector)
+
+        normal = self._plane.normal
+        across = normal - ray_vector * normal.dot(ray_vector)
+        if across.length < 1e-6:
+            # looking straight down at the base the height runs up the screen
+            return o + normal * offset.dot(view.up)
+
+        return o + normal * (offset.dot(across) / across.dot(across))
+
     def leftmouse(self, context, event):
         if self._last_point is not None:
             self._click_number += 1
-            
-        if self._click_number == 1:
-            self._first_point = self._last_point
+            self._clicks.push()
 
-    def mousemove(self, context, event):
-        o = Vector((0,0,0))
-        N = Vector((0,0,1))
-        self._last_point, view_normal = self.mousePlaneIntersection(context, event, o, N)
-        
-        if self._first_point is not None:
-            fp = self._first_point
-            lp = self._last_point
+    def mousemove(self, context, coord):
+        if self._click_number == 0:
+            # the plane of the shape follows the view until the first click
+            self.followView(context)
 
-            self._curve_path.points[0].co = (fp.x, fp.y, fp.z, 1)
-            self._curve_path.points[1].co = (lp.x, lp.y, lp.z, 1)
+        if self._click_number == self._lift_click:
+            point = self.liftPoint(context, coord)
+        else:
+            o, N = self.workingPlane(context)
+            point = self.mousePlaneIntersection(context, coord, o, N)
 
-class IDT_draw_triangle(IDT_draw_prototype, Operator):
-    """interactively draw a triangle"""
-    bl_idname = "curve.idt_draw_triangle"
-    bl_label = "Draw Triangle"
-    
-    _first_point  = None
-    _second_point = None
-    _last_point   = None
-    _curve        = None
-    _curve_data   = None
-    _curve_path   = None
-    
-    def modal(self, context, event):
-        if event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
-            # allow navagation
-            return {'PASS_THROUGH'}
-        elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
-            self.leftmouse(context, event)
-        elif event.type == 'MOUSEMOVE':
-            self.mousemove(context, event)
-        elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            self.cleanup(context)
-            return {'CANCELLED'}
-        
-        if self._click_number == 3:
-            return {"FINISHED"}
-        
-        return {'RUNNING_MODAL'}
-    
-    def invoke(self, context, event):
-        if context.space_data.type == 'VIEW_3D':
-            context.window_manager.modal_handler_add(self)
-            
+        if self.use_snap and point is not None:
+            snapped = self._session.snap_index.snap(point, self.snap_distance)
+            if snapped is not None:
+                point = snapped
+
+        if point == self._last_point:
+            return
+
+        self._last_point = point
+        if point is not None:
+            self._clicks.setCursor(point)
+
+        self.refreshGeometry()
+
+    def refreshGeometry(self):
+        if self._clicks and self._last_point is not None:
+            # build the shape in plane space, its normal is the z axis
+            plane = self._plane
+            points = plane.toPlane(self._clicks.points())
+            self.commitGeometry(plane.toWorld(shapes.shapePoints(self._shape, points, 2, self.segments)))
+
+############################
+# Line Draw Functions
+############################
+
+class IDT_draw_curve_prototype(IDT_draw_prototype):
+    """Prototype for draw functions that create a poly curve"""
+    _curve      = None
+    _curve_data = None
+    _repeatable = True
+
+    use_repeat = BoolProperty(
+        name="Continuous",
+        description="Keep drawing shapes into the same curve until "
+                    "cancelled with Esc or right click",
+        default=False
+    )
+
+    def newPath(self, curve_data):
+        path = curve_data.splines.new('POLY')
+        path.points.add(self.pointCount() - 1)
+        path.use_cyclic_u = self._cyclic
+        return path
+
+    def newData(self):
+        curve_data = bpy.data.curves.new(name=self._shape.title(), type='CURVE')
+        curve_data.dimensions = '3D'
+        self.newPath(curve_data)
+
+        return bpy.data.objects.new(self._shape.title(), curve_data)
+
+    def createData(self, context):
+        if self._curve is not None:
+            # further shapes of a continuous draw become new splines
+            self._curve_path = self.newPath(self._curve_data)
+        elif context.mode == 'EDIT_CURVE':
+            self._curve = context.object
+            self._curve_data = self._curve.data
+            self._curve_path = self.newPath(self._curve_data)
+            self._curve_data.splines.active = self._curve_path
+        else:
+            self._curve = self._session.acquire(self.poolKey()) or self.newData()
+            self._curve_data = self._curve.data
+            self._curve_path = self._curve_data.splines[0]
+            self.linkObject(context, self._curve)
+
+    def nextShape(self, context):
+        self._clicks.clear()
+        self._click_number = 0
+        self._preview_points = None
+
+        if not self.use_overlay:
+            self._curve_path = self.newPath(self._curve_data)
             if context.mode == 'EDIT_CURVE':
-                self._curve = context.object
-                self._curve_data = self._curve.data
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(2)
-                self._curve_path.use_cyclic_u = True
                 self._curve_data.splines.active = self._curve_path
-            else:
-                self._curve_data = bpy.data.curves.new(name='Triangle', type='CURVE')
-                self._curve_data.dimensions = '3D'
-                
-                self._curve = bpy.data.objects.new('Triangle', self._curve_data)
-                self._curve.location = (0,0,0)
-                bpy.context.scene.objects.link(self._curve)
-                bpy.ops.object.select_all(action="DESELECT")
-                self._curve.select = True
-                context.scene.objects.active = self._curve
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(2)
-                self._curve_path.use_cyclic_u = True
-            
-            return {'RUNNING_MODAL'}
-        else:
-            self.report({'WARNING'}, "Active space must be a View3d")
-            return {'CANCELLED'}
-        
+
+    def discardShape(self, context):
+        if not self.use_overlay:
+            self._curve_data.splines.remove(self._curve_path)
+            self._curve_data.update_tag()
+
     def cleanup(self, context):
         if self._curve is not None:
             if context.mode == 'EDIT_CURVE':
                 self._curve_data.splines.remove(self._curve_path)
             else:
-                bpy.context.scene.objects.unlink(self._curve)
-                bpy.data.objects.remove(self._curve)
-                bpy.data.curves.remove(self._curve_data)
-        
-    def leftmouse(self, context, event):
-        if self._last_point is not None:
-            self._click_number += 1
-            
+                # keep the object around for the next shape of this kind
+                self.commitGeometry([(0,0,0)] * self.pointCount())
+                context.scene.objects.unlink(self._curve)
+                self._session.release(self.poolKey(), self._curve)
+
+class IDT_draw_open_curve_prototype(IDT_draw_curve_prototype):
+    """Prototype for curves without a fixed number of points
+
+    The spline is allocated in chunks while drawing and swapped for one
+    holding exactly the points of finalPoints(), which every operator
+    built on this prototype defines."""
+
+    # points of a new spline
+    _chunk = 16
+
+    def newPath(self, curve_data):
+        path = curve_data.splines.new('POLY')
+        path.points.add(self._chunk - 1)
+        path.use_cyclic_u = self._cyclic
+        return path
+
+    def pointCount(self):
+        # pooled curves keep the length they were drawn with
+        if self._curve_path is not None:
+            return len(self._curve_path.points)
+        return self._chunk
+
+    def finishShape(self, context):
+        self._shapes_done += 1
+
+        if self.use_overlay:
+            self.createData(context)
+
+        points = self.finalPoints()
+        path = self._curve_data.splines.new('POLY')
+        path.points.add(len(points) - 1)
+        path.points.foreach_set("co", shapes.pointBuffer(points, 4))
+        path.use_cyclic_u = self._cyclic
+
+        self._curve_data.splines.remove(self._curve_path)
+        self._curve_path = path
+        if context.mode == 'EDIT_CURVE':
+            self._curve_data.splines.active = path
+
+        self.tagUpdate()
+
+class IDT_draw_stroke(IDT_draw_open_curve_prototype, Operator):
+    """interactively draw a freehand stroke: press, drag, then release"""
+    bl_idname = "curve.idt_draw_stroke"
+    bl_label = "Draw Stroke"
+
+    _shape      = 'STROKE'
+    _max_clicks = 2
+    _cyclic     = False
+
+    # while drawing the stroke grows by splines of this many points, each
+    # starting at the last point of the one before, so a long stroke never
+    # reallocates its points and a refresh only rewrites the newest spline
+    _chunk = 128
+
+    spacing = FloatProperty(
+        name="Spacing",
+        description="Shortest distance between two points of the stroke",
+        default=0.05,
+        min=0.0,
+        subtype='DISTANCE'
+    )
+    angle_tolerance = FloatProperty(
+        name="Angle Tolerance",
+        description="Samples that turn the stroke less than this extend "
+                    "the last segment instead of adding a point",
+        default=math.radians(5),
+        min=0.0,
+        max=math.pi / 2,
+        subtype='ANGLE'
+    )
+
+    # kept points as flat xyz, only the first _count are in use
+    _stroke  = None
+    _count   = 0
+    _written = 0
+
+    # the segment being extended: its start, direction and furthest sample
+    _anchor    = None
+    _direction = None
+    _candidate = None
+    _min_cos   = 1.0
+
+    # cursor position the geometry was last refreshed with
+    _shown = None
+
+    # splines of the stroke while drawing, the first one is _curve_path
+    _chunks = None
+
+    # overlay display lists, one per chunk of kept points
+    _lists = None
+
+    def modal(self, context, event):
         if self._click_number == 1:
-            self._first_point = self._last_point
-        
-        if self._click_number == 2:
-            self._second_point = self._last_point
+            if event.type == 'MOUSEMOVE':
+                # keep every sample, only the geometry waits for the timer
+                self.sample(context, (event.mouse_region_x, event.mouse_region_y))
+                return {'RUNNING_MODAL'}
+            elif event.type == 'TIMER':
+                self.refreshGeometry()
+                return {'RUNNING_MODAL'}
+        elif event.type == 'LEFTMOUSE' and event.value == 'PRESS':
+            self.flushMousemove(context)
+            if self._last_point is not None:
+                self.startStroke(self._last_point)
+            return {'RUNNING_MODAL'}
+
+        return IDT_draw_open_curve_prototype.modal(self, context, event)
+
+    def startStroke(self, point):
+        if self._stroke is None:
+            self._stroke = array('d', [0.0]) * (3 * 1024)
+
+        self.freeLists()
+        if self._curve_path is not None:
+            self._chunks = [self._curve_path]
+
+        self._count = 0
+        self._written = 0
+        self._direction = None
+        self._candidate = None
+        self._min_cos = math.cos(self.angle_tolerance)
+
+        self.keepPoint(point)
+        self._click_number = 1
+
+    def keepPoint(self, point):
+        i = 3 * self._count
+        if i == len(self._stroke):
+            self._stroke.extend(array('d', [0.0]) * len(self._stroke))
+
+        self._stroke[i]     = point[0]
+        self._stroke[i + 1] = point[1]
+        self._stroke[i + 2] = point[2]
+        self._count += 1
+        self._anchor = point
+
+    def sample(self, context, coord):
+        o, N = self.workingPlane(context)
+        point = self.mousePlaneIntersection(context, coord, o, N)
+        if point is None:
+            return
+
+        self._last_point = point
+
+        # radial distance and angle decimation, a sample only ever looks at
+        # the segment it may extend
+        delta = point - self._anchor
+        length = delta.length
+        if length < self.spacing:
+            return
+
+        if self._direction is None:
+            self._direction = delta / length
+        elif self._direction.dot(delta) < length * self._min_cos:
+            # the stroke turned, the furthest sample becomes a point
+            self.keepPoint(self._candidate)
+
+            delta = point - self._anchor
+            length = delta.length
+            if length < self.spacing:
+                self._direction = None
+                self._candidate = None
+                return
+            self._direction = delta / length
+
+        self._candidate = point
+
+    def finalPoints(self):
+        """The kept points followed by the cursor"""
+        kept = np.frombuffer(self._stroke, count=3 * self._count).reshape(-1, 3)
+        return np.vstack((kept, self._last_point))
+
+    def refreshGeometry(self):
+        if self._click_number != 1 or self._shown is self._last_point:
+            return
+
+        self._shown = self._last_point
+
+        if self._draw_handler is not None:
+            # the overlay draws straight from the stroke buffer
+            self._area.tag_redraw()
+            return
+
+        # the kept points and the cursor, chunk j holds those from
+        # j * step to j * step + step
+        chunks = self._chunks
+        step = self._chunk - 1
+        count = self._count
+
+        while len(chunks) <= count // step:
+            chunks.append(self.newPath(self._curve_data))
+
+        # only the points kept since the last refresh are new
+        stroke = self._stroke
+        for i in range(self._written, count):
+            co = stroke[3 * i], stroke[3 * i + 1], stroke[3 * i + 2], 1
+            j, k = divmod(i, step)
+            chunks[j].points[k].co = co
+            if k == 0 and j > 0:
+                chunks[j - 1].points[step].co = co
+        self._written = count
+
+        # the unused rest of the newest chunk collapses onto the cursor
+        x, y, z = self._last_point
+        j, k = divmod(count, step)
+        points = chunks[j].points
+        for i in range(k, self._chunk):
+            points[i].co = x, y, z, 1
+        if k == 0 and j > 0:
+            chunks[j - 1].points[step].co = x, y, z, 1
+
+        self.tagUpdate()
+
+    def dropChunks(self):
+        """Remove the splines the stroke grew into, the first one stays"""
+        if self._chunks is not None:
+            for path in self._chunks[1:]:
+                self._curve_data.splines.remove(path)
+            self._chunks = None
+
+    def finishShape(self, context):
+        self.dropChunks()
+        IDT_draw_open_curve_prototype.finishShape(self, context)
+
+    def discardShape(self, context):
+        self.dropChunks()
+        IDT_draw_open_curve_prototype.discardShape(self, context)
+
+    def cleanup(self, context):
+        self.dropChunks()
+        IDT_draw_open_curve_prototype.cleanup(self, context)
+
+    def drawStrip(self, start, stop, cursor=None):
+        """Line strip through the kept points from start to stop"""
+        stroke = self._stroke
+        bgl.glBegin(bgl.GL_LINE_STRIP)
+        for i in range(3 * start, 3 * stop, 3):
+            bgl.glVertex3f(stroke[i], stroke[i + 1], stroke[i + 2])
+        if cursor is not None:
+            bgl.glVertex3f(cursor[0], cursor[1], cursor[2])
+        bgl.glEnd()
+
+    def drawOverlay(self, context):
+        if self._click_number != 1:
+            return
+
+        if self._lists is None:
+            self._lists = []
+        lists = self._lists
+        step = self._chunk - 1
+
+        bgl.glEnable(bgl.GL_BLEND)
+        bgl.glColor4f(1.0, 0.6, 0.0, 1.0)
+        bgl.glLineWidth(2)
+
+        # chunks of points that are all kept never change, compile them
+        # once so a redraw does not walk the whole stroke
+        while (len(lists) + 1) * step < self._count:
+            start = len(lists) * step
+            gl_list = bgl.glGenLists(1)
+            bgl.glNewList(gl_list, bgl.GL_COMPILE)
+            self.drawStrip(start, start + step + 1)
+            bgl.glEndList()
+            lists.append(gl_list)
 
-    def mousemove(self, context, event):
-        o = Vector((0,0,0))
-        N = Vector((0,0,1))
-        self._last_point, view_normal = self.mousePlaneIntersection(context, event, o, N)
-        
-        if self._first_point is not None:
-            fp = self._first_point
-            lp = self._last_point
+        for gl_list in lists:
+            bgl.glCallList(gl_list)
 
-            self._curve_path.points[0].co = (fp.x, fp.y, fp.z, 1)
+        self.drawStrip(len(lists) * step, self._count, self._last_point)
 
-            if self._second_point is None:
-                self._curve_path.points[1].co = (lp.x, lp.y, lp.z, 1) 
-                self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-            else:
-                sp = self._second_point
-            
-                self._curve_path.points[1].co = (sp.x, sp.y, sp.z, 1)
-                self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-
-class IDT_draw_rectangle(IDT_draw_prototype, Operator):
-    """interactively draw a rectangle"""
-    bl_idname = "curve.idt_draw_rectangle"
-    bl_label = "Draw Rectangle"
-    
-    _first_point    = None
-    _last_point     = None
-    _curve      = None
-    _curve_data = None
-    _curve_path = None
+        # restore opengl defaults
+        bgl.glLineWidth(1)
+        bgl.glDisable(bgl.GL_BLEND)
+        bgl.glColor4f(0.0, 0.0, 0.0, 1.0)
+
+    def freeLists(self):
+        if self._lists:
+            for gl_list in self._lists:
+                bgl.glDeleteLists(gl_list, 1)
+        self._lists = None
+
+    def stopModal(self, context):
+        IDT_draw_open_curve_prototype.stopModal(self, context)
+        self.freeLists()
 
-    def modal(self, context, event):
-        if event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
-            # allow navagation
-            return {'PASS_THROUGH'}
-        elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
-            self.leftmouse(context, event)
-        elif event.type == 'MOUSEMOVE':
-            self.mousemove(context, event)
-        elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            self.cleanup(context)
-            return {'CANCELLED'}
-        
-        if self._click_number == 2:
-            return {"FINISHED"}
-        
-        return {'RUNNING_MODAL'}
-    
-    def invoke(self, context, event):
-        if context.space_data.type == 'VIEW_3D':
-            context.window_manager.modal_handler_add(self)
-            
-            if context.mode == 'EDIT_CURVE':
-                self._curve = context.object
-                self._curve_data = self._curve.data
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(3)
-                self._curve_path.use_cyclic_u = True
-                self._curve_data.splines.active = self._curve_path
-            else:                    
-                self._curve_data = bpy.data.curves.new(name='Rectangle', type='CURVE')
-                self._curve_data.dimensions = '3D'
-                
-                self._curve = bpy.data.objects.new('Rectangle', self._curve_data)
-                self._curve.location = (0,0,0)
-                bpy.context.scene.objects.link(self._curve)
-                bpy.ops.object.select_all(action="DESELECT")
-                self._curve.select = True
-                context.scene.objects.active = self._curve
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(3)
-                self._curve_path.use_cyclic_u = True
-            
-            return {'RUNNING_MODAL'}
-        else:
-            self.report({'WARNING'}, "Active space must be a View3d")
-            return {'CANCELLED'}
-        
-    def cleanup(self, context):
-        if self._curve is not None:
-            if context.mode == 'EDIT_CURVE':
-                self._curve_data.splines.remove(self._curve_path)
-            else:
-                bpy.context.scene.objects.unlink(self._curve)
-                bpy.data.objects.remove(self._curve)
-                bpy.data.curves.remove(self._curve_data)
-        
     def leftmouse(self, context, event):
-        if self._last_point is not None:
-            self._click_number += 1
-            
         if self._click_number == 1:
-            self._first_point = self._last_point
+            self._click_number = 2
+
+class IDT_draw_polygon(IDT_draw_open_curve_prototype, Operator):
+    """interactively draw a polygon: click every corner, Enter or a double click closes it"""
+    bl_idname = "curve.idt_draw_polygon"
+    bl_label = "Draw Polygon"
+
+    _shape      = 'POLYGON'
+    # only sizes the click buffer, the polygon is done once it is closed
+    _max_clicks = 16
+
+    _closed       = False
+    _skip_release = False
+
+    # corners already in the spline, the rows after the cursor repeat the
+    # first corner so moving the cursor never touches them
+    _placed = 0
 
-    def mousemove(self, context, event):
-        o = Vector((0,0,0))
-        N = Vector((0,0,1))
-        self._last_point, view_normal = self.mousePlaneIntersection(context, event, o, N)
-        
-        if self._first_point is not None:
-            
-            fp = self._first_point
-            lp = self._last_point
-
-            self._curve_path.points[0].co = (fp.x, fp.y, fp.z, 1)
-            
-            if abs(view_normal.y) == 1:
-                self._curve_path.points[1].co = (lp.x, lp.y, fp.z, 1)
-                self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-                self._curve_path.points[3].co = (fp.x, lp.y, lp.z, 1)
-            elif abs(view_normal.x) == 1:
-                self._curve_path.points[1].co = (lp.x, lp.y, fp.z, 1)
-                self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-                self._curve_path.points[3].co = (lp.x, fp.y, lp.z, 1)
-            else:
-                self._curve_path.points[1].co = (lp.x, fp.y, lp.z, 1)
-                self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-                self._curve_path.points[3].co = (fp.x, lp.y, lp.z, 1)
-
-class IDT_draw_quad(IDT_draw_prototype, Operator):
-    """interactively draw a quad"""
-    bl_idname = "curve.idt_draw_quad"
-    bl_label = "Draw Quad"
-    
-    _first_point  = None
-    _second_point = None
-    _third_point  = None
-    _last_point   = None
-    _curve        = None
-    _curve_data   = None
-    _curve_path   = None
-    
     def modal(self, context, event):
-        if event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
-            # allow navagation
-            return {'PASS_THROUGH'}
-        elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
-            self.leftmouse(context, event)
-        elif event.type == 'MOUSEMOVE':
-            self.mousemove(context, event)
-        elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            self.cleanup(context)
-            return {'CANCELLED'}
-        
-        if self._click_number == 4:
-            return {"FINISHED"}
-        
-        return {'RUNNING_MODAL'}
-    
-    def invoke(self, context, event):
-        if context.space_data.type == 'VIEW_3D':
-            context.window_manager.modal_handler_add(self)
-            
-            if context.mode == 'EDIT_CURVE':
-                self._curve = context.object
-                self._curve_data = self._curve.data
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(3)
-                self._curve_path.use_cyclic_u = True
-                self._curve_data.splines.active = self._curve_path
-            else:                   
-                self._curve_data = bpy.data.curves.new(name='Rectangle', type='CURVE')
-                self._curve_data.dimensions = '3D'
-                
-                self._curve = bpy.data.objects.new('Rectangle', self._curve_data)
-                self._curve.location = (0,0,0)
-                bpy.context.scene.objects.link(self._curve)
-                bpy.ops.object.select_all(action="DESELECT")
-                self._curve.select = True
-                context.scene.objects.active = self._curve
-                
-                self._curve_path = self._curve_data.splines.new('POLY')
-                self._curve_path.points.add(3)
-                self._curve_path.use_cyclic_u = True
-            
+        if event.type in {'RET', 'NUMPAD_ENTER'} and event.value == 'PRESS':
+            self.close()
+        elif event.type == 'LEFTMOUSE' and event.value == 'DOUBLE_CLICK':
+            # the first click of the double click placed the last corner
+            self._skip_release = self.close()
+        elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE' and self._skip_release:
+            self._skip_release = False
             return {'RUNNING_MODAL'}
-        else:
-            self.report({'WARNING'}, "Active space must be a View3d")
-            return {'CANCELLED'}
-        
-    def cleanup(self, context):
-        if self._curve is not None:
-            if context.mode == 'EDIT_CURVE':
-                self._curve_data.splines.remove(self._curve_path)
-            else:
-                bpy.context.scene.objects.unlink(self._curve)
-                bpy.data.objects.remove(self._curve)
-                bpy.data.curves.remove(self._curve_data)
-        
-    def leftmouse(self, context, event):
-        if self._last_point is not None:
-            self._click_number += 1
-            
-        if self._click_number == 1:
-            self._first_point = self._last_point
-        
-        if self._click_number == 2:
-            self._second_point = self._last_point
 
-        if self._click_number == 3:
-            self._third_point = self._last_point
+        return IDT_draw_open_curve_prototype.modal(self, context, event)
 
+    def close(self):
+        # it takes three corners to make a polygon
+        self._closed = self._click_number >= 3
+        return self._closed
 
-    def mousemove(self, context, event):
-        o = Vector((0,0,0))
-        N = Vector((0,0,1))
-        self._last_point, view_normal = self.mousePlaneIntersection(context, event, o, N)
-        
-        if self._first_point is not None: 
-            fp = self._first_point
-            lp = self._last_point
+    def shapeDone(self):
+        return self._closed
 
-            self._curve_path.points[0].co = (fp.x, fp.y, fp.z, 1)
+    def nextShape(self, context):
+        IDT_draw_open_curve_prototype.nextShape(self, context)
+        self._closed = False
+        self._placed = 0
 
-            if self._second_point is None:
-                self._curve_path.points[1].co = (lp.x, lp.y, lp.z, 1) 
-                self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-                self._curve_path.points[3].co = (lp.x, lp.y, lp.z, 1)
-            else:
-                sp = self._second_point
-            
-                if self._third_point is None:
-                    self._curve_path.points[1].co = (sp.x, sp.y, sp.z, 1)
-                    self._curve_path.points[2].co = (lp.x, lp.y, lp.z, 1)
-                    self._curve_path.points[3].co = (lp.x, lp.y, lp.z, 1)
-                else:
-                    tp = self._third_point
-                    self._curve_path.points[1].co = (sp.x, sp.y, sp.z, 1)
-                    self._curve_path.points[2].co = (tp.x, tp.y, tp.z, 1)
-                    self._curve_path.points[3].co = (lp.x, lp.y, lp.z, 1)
+    def finalPoints(self):
+        return self._clicks.points()[:-1].copy()
+
+    def fillTail(self, start, stop):
+        """Collapse the unused points onto the first corner"""
+        x, y, z = self._clicks.points()[0]
+        points = self._curve_path.points
+        for i in range(start, stop):
+            points[i].co = x, y, z, 1
+
+    def refreshGeometry(self):
+        count = len(self._clicks)
+        if not count or self._last_point is None:
+            return
+
+        if self._draw_handler is not None:
+            # the buffer may grow with the next click, hand out a copy
+            self.commitGeometry(self._clicks.points().copy())
+            return
+
+        points = self._curve_path.points
+        capacity = len(points)
+
+        if count >= capacity:
+            # double the spline, amortized this is constant per corner
+            points.add(capacity)
+            self.fillTail(capacity, 2 * capacity)
+            capacity *= 2
+
+        if count > self._placed:
+            corners = self._clicks.points()
+            for i in range(self._placed, count):
+                x, y, z = corners[i]
+                points[i].co = x, y, z, 1
+
+            if self._placed == 0:
+                self.fillTail(count + 1, capacity)
+            self._placed = count
+
+        # the rubber band corner is the only point a mouse move changes
+        x, y, z = self._last_point
+        points[count].co = x, y, z, 1
+
+        self.tagUpdate()
 
 ######################
 # Mesh Draw functions
 ######################
 
-class IDT_draw_plane(IDT_draw_prototype, Operator):
-    """interactively draw a plane"""
-    bl_idname = "mesh.idt_draw_plane"
-    bl_label = "Draw Plane"
-    
-    _first_point = None
-    _last_point  = None
-    _mesh       = None
-    _mesh_data  = None
-    
-    def modal(self, context, event):
-        if event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
-            # allow navagation
-            return {'PASS_THROUGH'}
-        elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
-            self.leftmouse(context, event)
-        elif event.type == 'MOUSEMOVE':
-            self.mousemove(context, event)
-        elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            self.cleanup(context)
-            return {'CANCELLED'}
-        
-        if self._click_number == 2:
-            return {"FINISHED"}
-        
-        return {'RUNNING_MODAL'}
-    
+class IDT_draw_mesh_prototype(IDT_draw_prototype):
+    """Prototype for draw functions that create a mesh object"""
+    _mesh      = None
+    _mesh_data = None
+
+    # edit mode drawing appends to the edit mesh through bmesh
+    _edit_mesh    = None
+    _edit_inverse = None
+    _bmesh        = None
+    _bm_verts     = None
+
+    # background job building the arrays of the current topology, with
+    # _swap set the timer swaps the mesh once it is done
+    _topology     = None
+    _topology_key = None
+    _swap         = False
+
     def invoke(self, context, event):
-        if context.space_data.type == 'VIEW_3D':
-            context.window_manager.modal_handler_add(self)
-            
-            if context.mode == 'EDIT_MESH':
-                print('your mom')
-                #self._curve = context.object
-                #self._curve_data = self._curve.data
-                
-                #self._curve_path = self._curve_data.splines.new('POLY')
-                #self._curve_path.points.add(3)
-                #self._curve_path.use_cyclic_u = True
-                #self._curve_data.splines.active = self._curve_path
-            else:                    
-                self._mesh_data = bpy.data.meshes.new(name='Plane')
-                
-                self._mesh = bpy.data.objects.new('Plane', self._mesh_data)
-                self._mesh.location = (0,0,0)
-                bpy.context.scene.objects.link(self._mesh)
-                bpy.ops.object.select_all(action="DESELECT")
-                self._mesh.select = True
-                context.scene.objects.active = self._mesh
-                
-                self._mesh_data.from_pydata([(0,0,0),(0,0,0),(0,0,0),(0,0,0)],[],[(0,1,2,3)])
-
-            
-            return {'RUNNING_MODAL'}
+        result = IDT_draw_prototype.invoke(self, context, event)
+
+        if self.use_overlay and 'RUNNING_MODAL' in result:
+            # ready by the time the shape is finished
+            self.topology()
+
+        return result
+
+    def shapeFaces(self):
+        return shapes.shapeFaces(self._shape, self.segments)
+
+    def topology(self):
+        """Future of the mesh arrays of the current topology"""
+        key = self.poolKey()
+        if self._topology is None or self._topology_key != key:
+            if self._topology is not None:
+                # a build that has not started yet is of no use anymore
+                self._topology.cancel()
+            self._topology_key = key
+            self._topology = submitJob(shapes.shapeMeshArrays, self._shape, self.segments)
+        return self._topology
+
+    def newMesh(self):
+        mesh_data = bpy.data.meshes.new(name=self._shape.title())
+        fillMesh(mesh_data, self.topology().result())
+        return mesh_data
+
+    def swapMesh(self):
+        """Replace the mesh by one with the current topology"""
+        self._swap = False
+
+        # meshes can not shrink, swap in a new one
+        old = self._mesh_data
+        self._mesh_data = self._mesh.data = self.newMesh()
+        bpy.data.meshes.remove(old)
+
+        self.refreshGeometry()
+
+    def flushMousemove(self, context):
+        if self._swap and self._topology.done():
+            self.swapMesh()
+
+        IDT_draw_prototype.flushMousemove(self, context)
+
+    def commitGeometry(self, points):
+        if self._swap and self._draw_handler is None:
+            # the mesh only fits the points once the new topology is in
+            return
+
+        IDT_draw_prototype.commitGeometry(self, points)
+
+    def finishShape(self, context):
+        if self._swap:
+            self.swapMesh()
+
+        IDT_draw_prototype.finishShape(self, context)
+
+    def newData(self):
+        return bpy.data.objects.new(self._shape.title(), self.newMesh())
+
+    def rebuildTopology(self, context):
+        """Recreate the geometry after the number of vertices changed"""
+        if self._bm_verts is not None:
+            bmesh.ops.delete(self._bmesh, geom=self._bm_verts, context=1)
+            self.createEditData(context)
+        elif self._mesh is not None:
+            # build the arrays in the background, the timer swaps the mesh
+            self.topology()
+            self._swap = True
+            return
         else:
-            self.report({'WARNING'}, "Active space must be a View3d")
-            return {'CANCELLED'}
-        
+            self.topology()
+
+        self.refreshGeometry()
+
+    def createData(self, context):
+        if context.mode == 'EDIT_MESH':
+            self.createEditData(context)
+            return
+
+        self._mesh = self._session.acquire(self.poolKey()) or self.newData()
+        self._mesh_data = self._mesh.data
+        self.linkObject(context, self._mesh)
+
+    def createEditData(self, context):
+        obj = context.edit_object
+        self._edit_mesh = obj.data
+        self._edit_inverse = np.array(obj.matrix_world.inverted())
+        self._bmesh = bm = bmesh.from_edit_mesh(self._edit_mesh)
+
+        # append only the new shape, the rest of the mesh is never visited
+        verts = self._bm_verts = [bm.verts.new((0,0,0)) for i in range(self.pointCount())]
+        for face in self.shapeFaces():
+            bm.faces.new([verts[i] for i in face]).select = True
+
+        bmesh.update_edit_mesh(self._edit_mesh, True, True)
+
+    def writeGeometry(self, points):
+        if self._bm_verts is None:
+            return IDT_draw_prototype.writeGeometry(self, points)
+
+        # edit mesh coordinates are in object space
+        m = self._edit_inverse
+        co = np.asarray(points, dtype=np.float64).dot(m[:3, :3].T) + m[:3, 3]
+
+        for v, c in zip(self._bm_verts, co.tolist()):
+            v.co = c
+
+        self.tagUpdate()
+
+    def tagUpdate(self):
+        if self._bm_verts is None:
+            self._mesh_data.update()
+        else:
+            # moving vertices needs neither tessellation nor a topology rebuild
+            bmesh.update_edit_mesh(self._edit_mesh, False, False)
+
     def cleanup(self, context):
-        if self._mesh is not None:
-            if context.mode == 'EDIT_CURVE':
-                self._curve_data.splines.remove(self._curve_path)
-            else:
-                bpy.context.scene.objects.unlink(self._mesh)
-                bpy.data.objects.remove(self._mesh)
-                bpy.data.curves.remove(self._mesh_data)
-        
-    def leftmouse(self, context, event):
-        if self._last_point is not None:
-            self._click_number += 1
-            
-        if self._click_number == 1:
-            self._first_point = self._last_point
+        if self._swap:
+            self.swapMesh()
 
-    def mousemove(self, context, event):
-        o = Vector((0,0,0))
-        N = Vector((0,0,1))
-        self._last_point, view_normal = self.mousePlaneIntersection(context, event, o, N)
-        
-        if self._first_point is not None:
-            
-            fp = self._first_point
-            lp = self._last_point
-
-            self._mesh_data.vertices[0].co = (fp.x, fp.y, fp.z)
-            
-            if abs(view_normal.y) == 1:
-                self._mesh_data.vertices[1].co = (lp.x, lp.y, fp.z)
-                self._mesh_data.vertices[2].co = (lp.x, lp.y, lp.z)
-                self._mesh_data.vertices[3].co = (fp.x, lp.y, lp.z)
-            elif abs(view_normal.x) == 1:
-                self._mesh_data.vertices[1].co = (lp.x, lp.y, fp.z)
-                self._mesh_data.vertices[2].co = (lp.x, lp.y, lp.z)
-                self._mesh_data.vertices[3].co = (lp.x, fp.y, lp.z)
-            else:
-                self._mesh_data.vertices[1].co = (lp.x, fp.y, lp.z)
-                self._mesh_data.vertices[2].co = (lp.x, lp.y, lp.z)
-                self._mesh_data.vertices[3].co = (fp.x, lp.y, lp.z)
+        if self._bm_verts is not None:
+            bmesh.ops.delete(self._bmesh, geom=self._bm_verts, context=1)
+            bmesh.update_edit_mesh(self._edit_mesh, True, True)
+        elif self._mesh is not None:
+            # keep the object around for the next shape of this kind
+            self.commitGeometry([(0,0,0)] * self.pointCount())
+            context.scene.objects.unlink(self._mesh)
+            self._session.release(self.poolKey(), self._mesh)
 
+class IDT_draw_grid(IDT_draw_mesh_prototype, Operator):
+    """interactively draw a grid, ctrl/shift + wheel change the subdivisions"""
+    bl_idname = "mesh.idt_draw_grid"
+    bl_label = "Draw Grid"
 
-class IDT_draw_cube(IDT_draw_prototype, Operator):
-    """interactively draw a cube"""
-    bl_idname = "mesh.idt_draw_cube"
-    bl_label = "Draw Cube"
-    
-    _first_point  = None
-    _second_point = None
-    _last_point   = None
-    _mesh         = None
-    _mesh_data   = None
-    _curve_path   = None
-    
-    def modal(self, context, event):
-        if event.type in {'MIDDLEMOUSE', 'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
-            # allow navagation
-            return {'PASS_THROUGH'}
-        elif event.type == 'LEFTMOUSE' and event.value == 'RELEASE':
-            self.leftmouse(context, event)
-        elif event.type == 'MOUSEMOVE':
-            self.mousemove(context, event)
-        elif event.type in {'RIGHTMOUSE', 'ESC'}:
-            self.cleanup(context)
-            return {'CANCELLED'}
-        
-        if self._click_number == 3:
-            return {"FINISHED"}
-        
-        return {'RUNNING_MODAL'}
-    
-    def invoke(self, context, event):
-        if context.space_data.type == 'VIEW_3D':
-            context.window_manager.modal_handler_add(self)
-            
-            if context.mode == 'EDIT_CURVE':
-                print('edit_curve')
-                #self._curve = context.object
-                #self._curve_data = self._curve.data
-                
-                #self._curve_path = self._curve_data.splines.new('POLY')
-                #self._curve_path.points.add(2)
-                #self._curve_path.use_cyclic_u = True
-                #self._curve_data.splines.active = self._curve_path
-            else:
-                self._mesh_data = bpy.data.meshes.new(name='Cube')
-                
-                self._mesh = bpy.data.objects.new('Cube', self._mesh_data)
-                self._mesh.location = (0,0,0)
-                bpy.context.scene.objects.link(self._mesh)
-                bpy.ops.object.select_all(action="DESELECT")
-                self._mesh.select = True
-                context.scene.objects.active = self._mesh
-
-                #
-                #        5───────6
-                #       ╱│      ╱│
-                #      ╱ │     ╱ │
-                #     4━━┿━━━━7  │
-                #     ┃  0────╂──1
-                #     ┃ ╱     ┃ ╱
-                #     ┃╱      ┃╱
-                #     3━━━━━━━2
-                #
-
-
-                verts = [
-                    (0,0,0), # [0] bottom north west
-                    (0,0,0), # [1] bottom north east
-                    (0,0,0), # [2] bottom south east
-                    (0,0,0), # [3] bottom south west
-                    (0,0,0), # [4] top south west
-                    (0,0,0), # [5] top north west
-                    (0,0,0), # [6] top north east
-                    (0,0,0)  # [7] top south east
-                ]
-
-                faces = [
-                    (0,3,2,1), # bottom
-                    (0,5,4,3),  # right
-                    (3,4,7,2),  # front
-                    (2,7,6,1),  # left
-                    (1,0,5,6),  # back
-                    (5,6,7,4)   # top
-                ]
-
-                self._mesh_data.from_pydata(verts, [], faces)
-            
-            return {'RUNNING_MODAL'}
+    _shape      = 'GRID'
+    _max_clicks = 2
+
+    x_subdivisions = IntProperty(name="X Subdivisions", default=10, min=1, max=4096)
+    y_subdivisions = IntProperty(name="Y Subdivisions", default=10, min=1, max=4096)
+
+    # vertex buffer of the grid, rewritten in place by every mouse move
+    _buffer = None
+
+    @property
+    def segments(self):
+        return self.x_subdivisions, self.y_subdivisions
+
+    def refreshGeometry(self):
+        if self._clicks and self._last_point is not None:
+            # only the two corners go through plane space, the grid itself
+            # is one affine map of the unit grid into the reused buffer
+            plane = self._plane
+            fp, lp = plane.toPlane(self._clicks.points()[:2])
+            self._buffer = shapes.gridBuffer(fp, lp, self.segments, plane._basis, plane._origin, self._buffer)
+            self.commitGeometry(self._buffer.reshape(-1, 3))
+
+    def overlayLoops(self, count):
+        # outlining a million quads would stall the viewport, draw the border
+        xs, ys = self.segments
+        return [(0, xs, count - 1, count - 1 - xs)]
+
+    def wheel(self, context, event):
+        if event.type not in {'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
+            return False
+        if not (event.ctrl or event.shift):
+            return False
+
+        sign = 1 if event.type == 'WHEELUPMOUSE' else -1
+
+        # step by about a tenth so large counts are reachable
+        if event.ctrl:
+            self.x_subdivisions += sign * max(1, self.x_subdivisions // 10)
+        if event.shift:
+            self.y_subdivisions += sign * max(1, self.y_subdivisions // 10)
+
+        self.rebuildTopology(context)
+        return True
+
+######################
+# Operator table
+######################
+
+# draw operators that only differ in their settings, the classes are
+# generated by register(): category, shape, label, description, clicks
+# and any further class attributes
+DRAW_OPERATORS = (
+    ('curve', 'LINE',      "Line",      "interactively draw a line", 2, {}),
+    ('curve', 'TRIANGLE',  "Triangle",  "interactively draw a triangle", 3, {}),
+    ('curve', 'RECTANGLE', "Rectangle", "interactively draw a rectangle", 2, {}),
+    ('curve', 'QUAD',      "Quad",      "interactively draw a quad", 4, {}),
+    ('curve', 'CIRCLE',    "Circle",    "interactively draw a circle: center, then radius", 2, {
+        'segments' : IntProperty(name="Segments", default=32, min=3, max=4096),
+    }),
+    ('curve', 'ELLIPSE',   "Ellipse",   "interactively draw an ellipse: center, then corner", 2, {
+        'segments' : IntProperty(name="Segments", default=32, min=3, max=4096),
+    }),
+    ('curve', 'NGON',      "Ngon",      "interactively draw a regular polygon: center, then radius", 2, {
+        'segments' : IntProperty(name="Sides", default=6, min=3, max=4096),
+    }),
+    ('curve', 'ARC',       "Arc",       "interactively draw an arc: center, start, then end", 3, {
+        '_cyclic'  : False,
+        'segments' : IntProperty(name="Segments", default=32, min=1, max=4096),
+    }),
+    ('mesh',  'PLANE',     "Plane",     "interactively draw a plane", 2, {}),
+    ('mesh',  'CUBE',      "Cube",      "interactively draw a cube", 3, {
+        '_lift_click' : 2,
+    }),
+    ('mesh',  'CYLINDER',  "Cylinder",  "interactively draw a cylinder: center, radius, then height", 3, {
+        '_lift_click' : 2,
+        'segments'    : IntProperty(name="Segments", default=32, min=3, max=4096),
+    }),
+    ('mesh',  'CONE',      "Cone",      "interactively draw a cone: center, radius, then height", 3, {
+        '_lift_click' : 2,
+        'segments'    : IntProperty(name="Segments", default=32, min=3, max=4096),
+    }),
+)
+
+DRAW_PROTOTYPES = {
+    'curve' : IDT_draw_curve_prototype,
+    'mesh'  : IDT_draw_mesh_prototype,
+}
+
+def drawOperator(category, shape, label, description, clicks, attributes):
+    """Operator class drawing one shape of the operator table"""
+    name = "idt_draw_" + shape.lower()
+
+    namespace = dict(attributes)
+    namespace.update({
+        '__doc__'     : description,
+        'bl_idname'   : "%s.%s" % (category, name),
+        'bl_label'    : "Draw " + label,
+        '_shape'      : shape,
+        '_max_clicks' : clicks,
+    })
+
+    return type("IDT_draw_" + shape.lower(), (DRAW_PROTOTYPES[category], Operator), namespace)
+
+######################
+# Batch Draw functions
+######################
+
+def loadShapeRecords(filepath, kind='RECTANGLE', plane='XY'):
+    """Read shape records from a .json, .csv or .npy file
+
+    json: a list of {"type": ..., "points": [[x,y,z], ...], "plane": ...}
+    csv:  one shape per row as type, plane, x1, y1, z1, x2, y2, z2, ...
+    npy:  an (n, points, 3) float array, all of the given kind and plane
+    """
+    importHelpers()
+    ext = os.path.splitext(filepath)[1].lower()
+
+    if ext == '.json':
+        with open(filepath) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data['shapes']
+        return data
+    elif ext == '.csv':
+        records = []
+        with open(filepath, newline='') as f:
+            for row in csv.reader(f):
+                if not row or row[0].startswith('#'):
+                    continue
+                co = [float(c) for c in row[2:]]
+                points = [co[i:i+3] for i in range(0, len(co) - 2, 3)]
+                records.append({'type' : row[0], 'plane' : row[1] or plane, 'points' : points})
+        return records
+    elif ext == '.npy':
+        data = np.load(filepath)
+        data = data.reshape(len(data), -1, 3)
+        return [{'type' : kind, 'plane' : plane, 'points' : points} for points in data]
+
+    raise ValueError("Unsupported shape file: %s" % filepath)
+
+def batchDrawShapes(scene, records, name='Shapes'):
+    """Build shape records into at most one curve and one mesh object
+
+    Every curve shape becomes a spline of the same curve and every mesh
+    shape is appended to the same mesh, so the number of objects does not
+    grow with the number of records. Returns the created objects."""
+    importHelpers()
+    paths = []
+    verts = []
+    faces = []
+
+    for record in records:
+        kind = record['type'].upper()
+        if kind not in shapes.MESH_SHAPES and kind not in shapes.CURVE_SHAPES:
+            raise ValueError("Unknown shape type: %s" % record['type'])
+
+        axis = shapes.PLANE_AXIS[(record.get('plane') or 'XY').upper()]
+        segments = record.get('segments') or 32
+        points = shapes.shapePoints(kind, record['points'], axis, segments)
+
+        if kind in shapes.MESH_SHAPES:
+            offset = len(verts)
+            verts.extend(points)
+            faces.extend(tuple(offset + i for i in face) for face in shapes.shapeFaces(kind, segments))
         else:
-            self.report({'WARNING'}, "Active space must be a View3d")
+            paths.append((points, kind not in shapes.OPEN_SHAPES))
+
+    objects = []
+
+    if paths:
+        curve_data = bpy.data.curves.new(name=name, type='CURVE')
+        curve_data.dimensions = '3D'
+
+        for points, cyclic in paths:
+            spline = curve_data.splines.new('POLY')
+            spline.points.add(len(points) - 1)
+            spline.points.foreach_set("co", shapes.pointBuffer(points, 4))
+            spline.use_cyclic_u = cyclic
+
+        objects.append(bpy.data.objects.new(name, curve_data))
+
+    if faces:
+        mesh_data = bpy.data.meshes.new(name=name)
+        meshFromArrays(mesh_data, verts, faces)
+        objects.append(bpy.data.objects.new(name, mesh_data))
+
+    for obj in objects:
+        scene.objects.link(obj)
+
+    return objects
+
+class IDT_batch_draw(Operator):
+    """create shapes from a .json, .csv or .npy file of shape records"""
+    bl_idname = "object.idt_batch_draw"
+    bl_label = "Batch Draw Shapes"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filepath = StringProperty(subtype='FILE_PATH')
+    shape = EnumProperty(
+        name="Shape",
+        description="Shape of the records in .npy files",
+        items=[(k, k.title(), "") for k in ('LINE', 'TRIANGLE', 'RECTANGLE', 'QUAD', 'CIRCLE', 'ELLIPSE',
+                                            'NGON', 'ARC', 'PLANE', 'GRID', 'CUBE', 'CYLINDER', 'CONE')],
+        default='RECTANGLE'
+    )
+    plane = EnumProperty(
+        name="Plane",
+        description="Drawing plane of the records in .npy files",
+        items=[(k, k, "") for k in ('XY', 'XZ', 'YZ')],
+        default='XY'
+    )
+
+    def execute(self, context):
+        try:
+            records = loadShapeRecords(self.filepath, self.shape, self.plane)
+            batchDrawShapes(context.scene, records)
+        except (IOError, ValueError, KeyError, IndexError) as e:
+            self.report({'ERROR'}, "Could not draw shapes: %s" % e)
             return {'CANCELLED'}
-        
-    def cleanup(self, context):
-        if self._mesh is not None:
-            if context.mode == 'EDIT_CURVE':
-                self._curve_data.splines.remove(self._curve_path)
-            else:
-                bpy.context.scene.objects.unlink(self._mesh)
-                bpy.data.objects.remove(self._mesh)
-                bpy.data.curves.remove(self._mesh_data)
-        
-    def leftmouse(self, context, event):
-        if self._last_point is not None:
-            self._click_number += 1
-            
-        if self._click_number == 1:
-            self._first_point = self._last_point
-        
-        if self._click_number == 2:
-            self._second_point = self._last_point
 
-    def mousemove(self, context, event):
-        o = Vector((0,0,0))
-        N = Vector((0,0,1))
+        return {'FINISHED'}
 
-        if self._click_number == 2:
-           N = Vector((0,1,0))
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
-        self._last_point, view_normal = self.mousePlaneIntersection(context, event, o, N)
-        
-        if self._first_point is not None:
-            fp = self._first_point
-            lp = self._last_point
-
-            self._mesh_data.vertices[0].co = (fp.x, fp.y, fp.z)
-            self._mesh_data.vertices[5].co = (fp.x, fp.y, fp.z)
-
-            if self._second_point is None:
-                if abs(view_normal.y) == 1:
-                    # Top
-                    self._mesh_data.vertices[1].co = (lp.x, lp.y, fp.z)
-                    self._mesh_data.vertices[2].co = (lp.x, lp.y, lp.z)
-                    self._mesh_data.vertices[3].co = (fp.x, lp.y, lp.z)
-
-                    # Bottom
-                    self._mesh_data.vertices[6].co = (lp.x, lp.y, fp.z)
-                    self._mesh_data.vertices[7].co = (lp.x, lp.y, lp.z)
-                    self._mesh_data.vertices[4].co = (fp.x, lp.y, lp.z)
-                elif abs(view_normal.x) == 1:
-                    # Top
-                    self._mesh_data.vertices[1].co = (lp.x, lp.y, fp.z)
-                    self._mesh_data.vertices[2].co = (lp.x, lp.y, lp.z)
-                    self._mesh_data.vertices[3].co = (lp.x, fp.y, lp.z)
-
-                    # Bottom
-                    self._mesh_data.vertices[6].co = (lp.x, lp.y, fp.z)
-                    self._mesh_data.vertices[7].co = (lp.x, lp.y, lp.z)
-                    self._mesh_data.vertices[4].co = (lp.x, fp.y, lp.z)
-                else:
-                    # Top
-                    self._mesh_data.vertices[1].co = (lp.x, fp.y, lp.z)
-                    self._mesh_data.vertices[2].co = (lp.x, lp.y, lp.z)
-                    self._mesh_data.vertices[3].co = (fp.x, lp.y, lp.z)
-
-                    # Bottom
-                    self._mesh_data.vertices[6].co = (lp.x, fp.y, lp.z)
-                    self._mesh_data.vertices[7].co = (lp.x, lp.y, lp.z)
-                    self._mesh_data.vertices[4].co = (fp.x, lp.y, lp.z)
-            else:
-                sp = self._second_point
-            
-                self._mesh_data.vertices[4].co.z = lp.z
-                self._mesh_data.vertices[5].co.z = lp.z
-                self._mesh_data.vertices[6].co.z = lp.z
-                self._mesh_data.vertices[7].co.z = lp.z
+######################
+# Profiling
+######################
+
+# methods the profiler times: the ray cast, building and writing the points
+# of a shape and letting Blender know. Every shape is built in
+# refreshGeometry, the stroke, polygon and grid override it.
+PROFILED_METHODS = (
+    ('ray',    IDT_draw_prototype,      'mousePlaneIntersection'),
+    ('write',  IDT_draw_prototype,      'refreshGeometry'),
+    ('write',  IDT_draw_prototype,      'commitGeometry'),
+    ('write',  IDT_draw_prototype,      'writeGeometry'),
+    ('write',  IDT_draw_mesh_prototype, 'commitGeometry'),
+    ('write',  IDT_draw_mesh_prototype, 'writeGeometry'),
+    ('write',  IDT_draw_stroke,         'refreshGeometry'),
+    ('write',  IDT_draw_polygon,        'refreshGeometry'),
+    ('write',  IDT_draw_grid,           'refreshGeometry'),
+    ('update', IDT_draw_prototype,      'tagUpdate'),
+    ('update', IDT_draw_mesh_prototype, 'tagUpdate'),
+)
+
+def toggleProfile(self, context):
+    if self.idt_profile:
+        _profile.reset()
+        _profile.enable(PROFILED_METHODS)
+    else:
+        _profile.disable()
+
+class IDT_profile_dump(Operator):
+    """Save the timings of the draw operators to a JSON file"""
+    bl_idname = "wm.idt_profile_dump"
+    bl_label  = "Dump Timings"
+
+    filepath = StringProperty(subtype='FILE_PATH')
+    filter_glob = StringProperty(default="*.json", options={'HIDDEN'})
+
+    def execute(self, context):
+        try:
+            _profile.dump(bpy.path.ensure_ext(self.filepath, ".json"))
+        except IOError as e:
+            self.report({'ERROR'}, "Could not save timings: %s" % e)
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        self.filepath = "idt_profile.json"
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
 
 ######################
 # Interface
@@ -756,18 +1903,17 @@ class VIEW3D_IDT_draw_shapes_panel(InteractiveDrawPanel, Panel):
 
         layout.operator("mesh.idt_draw_plane", text="Plane", icon='MESH_PLANE')
         layout.operator("mesh.idt_draw_cube", text="Cube", icon='MESH_CUBE')
-        #layout.operator("mesh.primitive_circle_add", text="Circle", icon='MESH_CIRCLE')
+        layout.operator("mesh.idt_draw_grid", text="Grid", icon='MESH_GRID')
         #layout.operator("mesh.primitive_uv_sphere_add", text="UV Sphere", icon='MESH_UVSPHERE')
         #layout.operator("mesh.primitive_ico_sphere_add", text="Ico Sphere", icon='MESH_ICOSPHERE')
-        #layout.operator("mesh.primitive_cylinder_add", text="Cylinder", icon='MESH_CYLINDER')
-        #layout.operator("mesh.primitive_cone_add", text="Cone", icon='MESH_CONE')
+        layout.operator("mesh.idt_draw_cylinder", text="Cylinder", icon='MESH_CYLINDER')
+        layout.operator("mesh.idt_draw_cone", text="Cone", icon='MESH_CONE')
         #layout.operator("mesh.primitive_torus_add", text="Torus", icon='MESH_TORUS')
 
         # if label:
         #     layout.label(text="Special:")
         # else:
         #     layout.separator()
-        # layout.operator("mesh.primitive_grid_add", text="Grid", icon='MESH_GRID')
         # layout.operator("mesh.primitive_monkey_add", text="Monkey", icon='MESH_MONKEY')
         
     @staticmethod
@@ -778,6 +1924,12 @@ class VIEW3D_IDT_draw_shapes_panel(InteractiveDrawPanel, Panel):
         layout.operator("curve.idt_draw_triangle", text="Triangle", icon='EDITMODE_VEC_DEHLT')
         layout.operator("curve.idt_draw_rectangle", text="Rectangle", icon='STICKY_UVS_VERT')
         layout.operator("curve.idt_draw_quad", text="Quad", icon='EDIT_VEC')
+        layout.operator("curve.idt_draw_circle", text="Circle", icon='CURVE_BEZCIRCLE')
+        layout.operator("curve.idt_draw_ellipse", text="Ellipse", icon='MESH_CIRCLE')
+        layout.operator("curve.idt_draw_ngon", text="Ngon", icon='CURVE_NCIRCLE')
+        layout.operator("curve.idt_draw_arc", text="Arc", icon='SPHERECURVE')
+        layout.operator("curve.idt_draw_polygon", text="Polygon", icon='OUTLINER_DATA_MESH')
+        layout.operator("curve.idt_draw_stroke", text="Stroke", icon='GREASEPENCIL')
         
 
     def draw(self, context):
@@ -790,6 +1942,21 @@ class VIEW3D_IDT_draw_shapes_panel(InteractiveDrawPanel, Panel):
         col = layout.column(align=True)
         col.label(text="Curve:")
         self.draw_add_curve(col)
+
+        col = layout.column(align=True)
+        col.label(text="Batch:")
+        col.operator("object.idt_batch_draw", text="From File", icon='FILESEL')
+
+        wm = context.window_manager
+        col = layout.column(align=True)
+        col.prop(wm, "idt_profile")
+        if wm.idt_profile:
+            stats = _profile.stats()
+            col.label(text="p50 / p95 / p99 ms:")
+            for stage in _profile.stages:
+                t = stats[stage]
+                col.label(text="%s: %.2f / %.2f / %.2f" % (stage, t['p50'], t['p95'], t['p99']))
+            col.operator("wm.idt_profile_dump", icon='FILE_TEXT')
         
 class VIEW3D_IDT_draw_shapes_panel_edit(InteractiveDrawPanel, Panel):
     bl_category = "Interactive"
@@ -801,25 +1968,60 @@ class VIEW3D_IDT_draw_shapes_panel_edit(InteractiveDrawPanel, Panel):
         col = layout.column(align=True)
         VIEW3D_IDT_draw_shapes_panel.draw_add_curve(col, label=True)
 
+class VIEW3D_IDT_draw_shapes_panel_edit_mesh(InteractiveDrawPanel, Panel):
+    bl_category = "Interactive"
+    bl_context  = "mesh_edit"
+    bl_label    = "Draw Shapes"
+
+    def draw(self, context):
+        layout = self.layout
+        col = layout.column(align=True)
+        VIEW3D_IDT_draw_shapes_panel.draw_add_mesh(col, label=True)
+
+# registered classes, the draw operators are generated first
+_classes = []
+
 def register():
-    bpy.utils.register_class(IDT_draw_line)
-    bpy.utils.register_class(IDT_draw_triangle)
-    bpy.utils.register_class(IDT_draw_rectangle)
-    bpy.utils.register_class(IDT_draw_quad)
-    bpy.utils.register_class(IDT_draw_plane)
-    bpy.utils.register_class(IDT_draw_cube)
-    bpy.utils.register_class(VIEW3D_IDT_draw_shapes_panel)
-    bpy.utils.register_class(VIEW3D_IDT_draw_shapes_panel_edit)
+    _classes[:] = [drawOperator(*entry) for entry in DRAW_OPERATORS]
+    _classes.extend((
+        IDT_draw_polygon,
+        IDT_draw_stroke,
+        IDT_draw_grid,
+        IDT_batch_draw,
+        IDT_profile_dump,
+        VIEW3D_IDT_draw_shapes_panel,
+        VIEW3D_IDT_draw_shapes_panel_edit,
+        VIEW3D_IDT_draw_shapes_panel_edit_mesh,
+    ))
+
+    for cls in _classes:
+        bpy.utils.register_class(cls)
+
+    bpy.types.WindowManager.idt_profile = BoolProperty(
+        name="Profile",
+        description="Record timings of the interactive draw operators",
+        default=False,
+        update=toggleProfile
+    )
+    bpy.app.driver_namespace['idt_profile'] = _profile
+    bpy.app.handlers.scene_update_post.append(countMeshChanges)
+    bpy.app.handlers.load_post.append(forgetSessions)
     
 def unregister():
-    bpy.utils.unregister_class(IDT_draw_line)
-    bpy.utils.unregister_class(IDT_draw_triangle)
-    bpy.utils.unregister_class(IDT_draw_rectangle)
-    bpy.utils.unregister_class(IDT_draw_quad)
-    bpy.utils.unregister_class(IDT_draw_plane)
-    bpy.utils.unregister_class(IDT_draw_cube)
-    bpy.utils.unregister_class(VIEW3D_IDT_draw_shapes_panel)
-    bpy.utils.unregister_class(VIEW3D_IDT_draw_shapes_panel_edit)
+    for cls in reversed(_classes):
+        bpy.utils.unregister_class(cls)
+    del _classes[:]
+
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+    _profile.disable()
+    bpy.app.handlers.scene_update_post.remove(countMeshChanges)
+    bpy.app.handlers.load_post.remove(forgetSessions)
+    del bpy.types.WindowManager.idt_profile
+    bpy.app.driver_namespace.pop('idt_profile', None)
     
 if __name__ == "__main__":
     register()
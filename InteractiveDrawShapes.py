@@ -0,0 +1,437 @@
+"""Shape kernel of the Interactive Draw Tools
+
+Everything in this module works on plain (x, y, z) sequences and numpy
+arrays. It must not touch bpy or mathutils, so it can be used, tested and
+profiled with nothing but numpy."""
+
+import math
+import numpy as np
+
+from array import array
+
+######################
+# Batch functions
+######################
+
+def rayPlaneIntersectionBatch(P0, V, o, N):
+    """Batched rayPlaneIntersection for (n,3) arrays of ray origins and
+    directions, P0 may also be a single origin shared by every ray.
+
+    Returns an (n,3) array of hits and a boolean mask that is False where
+    the ray is parallel to the plane (those rows are NaN)."""
+    P0 = np.asarray(P0, dtype=np.float64)
+    V  = np.asarray(V, dtype=np.float64)
+    o  = np.asarray(o, dtype=np.float64)
+    N  = np.asarray(N, dtype=np.float64)
+
+    denom = V.dot(N)
+    valid = denom != 0
+
+    d = (o - P0).dot(N) / np.where(valid, denom, 1.0)
+    hits = d[:, None] * V + P0
+    hits[~valid] = np.nan
+
+    return hits, valid
+
+def regionRaysBatch(coords, width, height, perspective_matrix, view_matrix, is_perspective=True):
+    """Batched view3d_utils.region_2d_to_origin_3d / region_2d_to_vector_3d
+    for an (n,2) array of region pixel coordinates"""
+    coords  = np.asarray(coords, dtype=np.float64)
+    persinv = np.linalg.inv(np.array(perspective_matrix, dtype=np.float64))
+    viewinv = np.linalg.inv(np.array(view_matrix, dtype=np.float64))
+
+    dx = (2.0 * coords[:, 0] / width) - 1.0
+    dy = (2.0 * coords[:, 1] / height) - 1.0
+
+    if is_perspective:
+        out = np.empty((len(coords), 3))
+        out[:, 0] = dx
+        out[:, 1] = dy
+        out[:, 2] = -0.5
+
+        w = out.dot(persinv[3, :3]) + persinv[3, 3]
+        origins = viewinv[:3, 3]
+        vectors = (out.dot(persinv[:3, :3].T) + persinv[:3, 3]) / w[:, None] - origins
+        vectors /= np.sqrt((vectors * vectors).sum(axis=1))[:, None]
+    else:
+        origins = (dx[:, None] * persinv[:3, 0] + dy[:, None] * persinv[:3, 1] +
+                   persinv[:3, 3] - persinv[:3, 2])
+        vectors = -viewinv[:3, 2] / np.sqrt(viewinv[:3, 2].dot(viewinv[:3, 2]))
+        vectors = np.tile(vectors, (len(coords), 1))
+
+    return origins, vectors
+
+def regionPlaneIntersectionBatch(coords, width, height, perspective_matrix, view_matrix, o, N, is_perspective=True):
+    """Project an (n,2) array of region coordinates onto the plane (o, N),
+    returns the (n,3) hits and their validity mask"""
+    origins, vectors = regionRaysBatch(coords, width, height,
+                                       perspective_matrix, view_matrix, is_perspective)
+    return rayPlaneIntersectionBatch(origins, vectors, o, N)
+
+def pointBuffer(points, size):
+    """Flatten points into a float buffer of `size` components per point"""
+    if isinstance(points, np.ndarray):
+        if size == 3 and points.dtype == np.float32 and points.flags.c_contiguous:
+            # already laid out the way foreach_set takes it
+            return points.reshape(-1)
+
+        co = np.ones((len(points), size), dtype=np.float32)
+        co[:, :3] = points
+        return co.ravel()
+
+    co = array('f')
+    if size == 4:
+        for p in points:
+            co.extend((p[0], p[1], p[2], 1))
+    else:
+        for p in points:
+            co.extend((p[0], p[1], p[2]))
+    return co
+
+def meshArrays(verts, faces, uvs=None):
+    """Flat arrays fillMesh() builds a mesh from
+
+    Plain numpy, so it can run off the main thread. uvs are optional per
+    vertex texture coordinates."""
+    co = np.asarray(verts, dtype=np.float32).ravel()
+
+    if isinstance(faces, np.ndarray):
+        # faces with the same number of corners, one per row
+        loop_total = np.full(len(faces), faces.shape[1], dtype=np.int32)
+        vertex_index = faces.astype(np.int32).ravel()
+    else:
+        loop_total = np.array([len(f) for f in faces], dtype=np.int32)
+        vertex_index = np.array([i for f in faces for i in f], dtype=np.int32)
+
+    loop_start = np.zeros(len(faces), dtype=np.int32)
+    np.cumsum(loop_total[:-1], out=loop_start[1:])
+
+    if uvs is not None:
+        uvs = np.asarray(uvs, dtype=np.float32)[vertex_index].ravel()
+
+    return co, vertex_index, loop_start, loop_total, uvs
+
+######################
+# Shape functions
+######################
+
+#
+#        5───────6
+#       ╱│      ╱│
+#      ╱ │     ╱ │
+#     4━━┿━━━━7  │
+#     ┃  0────╂──1
+#     ┃ ╱     ┃ ╱
+#     ┃╱      ┃╱
+#     3━━━━━━━2
+#
+CUBE_FACES = [
+    (0,3,2,1), # bottom
+    (0,5,4,3), # right
+    (3,4,7,2), # front
+    (2,7,6,1), # left
+    (1,0,5,6), # back
+    (5,6,7,4)  # top
+]
+
+PLANE_FACES = [(0,1,2,3)]
+
+# index of the normal axis of each axis aligned drawing plane
+PLANE_AXIS = {'YZ' : 0, 'XZ' : 1, 'XY' : 2}
+
+# number of vertices of every shape
+SHAPE_POINTS = {
+    'LINE'      : 2,
+    'TRIANGLE'  : 3,
+    'RECTANGLE' : 4,
+    'QUAD'      : 4,
+    'PLANE'     : 4,
+    'CUBE'      : 8,
+}
+
+CURVE_SHAPES = {'LINE', 'TRIANGLE', 'RECTANGLE', 'QUAD', 'CIRCLE', 'ELLIPSE', 'NGON', 'ARC'}
+MESH_SHAPES  = {'PLANE', 'CUBE', 'CYLINDER', 'CONE', 'GRID'}
+
+# curve shapes that are not closed
+OPEN_SHAPES  = {'ARC'}
+
+# memoized unit rings and face lists of the parametric shapes
+_unit_rings   = {}
+_unit_steps   = {}
+_unit_grids   = {}
+_grid_coords  = {}
+_shape_faces  = {'PLANE' : PLANE_FACES, 'CUBE' : CUBE_FACES}
+
+def viewAxis(view_normal, tolerance=1e-4):
+    """Index of the axis an axis aligned view looks along, z otherwise"""
+    for axis in (1, 0):
+        if abs(view_normal[axis]) > 1 - tolerance:
+            return axis
+    return 2
+
+def planeAxes(axis):
+    """The two axes spanning the plane whose normal is axis"""
+    return [i for i in range(3) if i != axis]
+
+def rectanglePoints(fp, lp, axis=2):
+    """Corners of the rectangle spanned by fp and lp on the plane whose
+    normal is the given axis"""
+    u, v = planeAxes(axis)
+
+    p1 = [lp[0], lp[1], lp[2]]
+    p1[v] = fp[v]
+    p3 = [lp[0], lp[1], lp[2]]
+    p3[u] = fp[u]
+
+    return [(fp[0], fp[1], fp[2]), tuple(p1), (lp[0], lp[1], lp[2]), tuple(p3)]
+
+def cubePoints(fp, lp, height=None, axis=2):
+    """Corners of the box with base fp-lp, the top is lifted along the
+    plane axis to height (or sits on the base when height is None)"""
+    b = rectanglePoints(fp, lp, axis)
+    top = [b[3], b[0], b[1], b[2]]
+
+    if height is not None:
+        lifted = []
+        for p in top:
+            p = list(p)
+            p[axis] = height
+            lifted.append(tuple(p))
+        top = lifted
+
+    return b + top
+
+def unitRing(segments, axis=2):
+    """(segments, 3) array of the unit circle on the plane of axis"""
+    key = segments, axis
+    ring = _unit_rings.get(key)
+
+    if ring is None:
+        u, v = planeAxes(axis)
+        angles = np.arange(segments) * (2 * math.pi / segments)
+
+        ring = np.zeros((segments, 3))
+        ring[:, u] = np.cos(angles)
+        ring[:, v] = np.sin(angles)
+        _unit_rings[key] = ring
+
+    return ring
+
+def unitSteps(segments):
+    """segments + 1 evenly spaced fractions from 0 to 1"""
+    steps = _unit_steps.get(segments)
+    if steps is None:
+        steps = _unit_steps[segments] = np.arange(segments + 1) / segments
+    return steps
+
+def ringPoints(center, rim, segments, axis=2):
+    """Ring around center through rim, a single scale and translate of
+    the memoized unit ring"""
+    u, v = planeAxes(axis)
+    radius = math.hypot(rim[u] - center[u], rim[v] - center[v])
+
+    return unitRing(segments, axis) * radius + (center[0], center[1], center[2])
+
+def ellipsePoints(center, corner, segments, axis=2):
+    """Ellipse around center inside the rectangle centered on it through
+    corner, a non-uniform scale and translate of the memoized unit ring"""
+    radii = [abs(corner[i] - center[i]) for i in range(3)]
+    radii[axis] = 1.0
+
+    return unitRing(segments, axis) * radii + (center[0], center[1], center[2])
+
+def arcPoints(center, start, end, segments, axis=2):
+    """Counter clockwise arc around center from start to end, a full
+    circle while end is None"""
+    u, v = planeAxes(axis)
+    du, dv = start[u] - center[u], start[v] - center[v]
+
+    a0 = math.atan2(dv, du)
+    if end is None:
+        sweep = 2 * math.pi
+    else:
+        sweep = (math.atan2(end[v] - center[v], end[u] - center[u]) - a0) % (2 * math.pi)
+
+    angles = unitSteps(segments) * sweep + a0
+    radius = math.hypot(du, dv)
+
+    arc = np.empty((segments + 1, 3))
+    arc[:] = (center[0], center[1], center[2])
+    arc[:, u] += np.cos(angles) * radius
+    arc[:, v] += np.sin(angles) * radius
+
+    return arc
+
+def gridSubdivisions(segments):
+    """(x, y) subdivisions of a grid from a pair or a single count"""
+    if isinstance(segments, (tuple, list)):
+        return segments[0], segments[1]
+    return segments, segments
+
+def unitGrid(xs, ys, axis=2):
+    """((xs+1)*(ys+1), 3) array of the unit square grid on the plane of
+    axis, rows run along the first plane axis"""
+    key = xs, ys, axis
+    grid = _unit_grids.get(key)
+
+    if grid is None:
+        # a drag only ever needs the grid of the current subdivisions
+        _unit_grids.clear()
+
+        u, v = planeAxes(axis)
+        gu, gv = np.meshgrid(np.linspace(0, 1, xs + 1), np.linspace(0, 1, ys + 1))
+
+        grid = np.zeros((len(gu.flat), 3))
+        grid[:, u] = gu.ravel()
+        grid[:, v] = gv.ravel()
+        _unit_grids[key] = grid
+
+    return grid
+
+def gridPoints(fp, lp, segments, axis=2):
+    """Vertices of the subdivided rectangle spanned by fp and lp, a single
+    scale and translate of the memoized unit grid"""
+    xs, ys = gridSubdivisions(segments)
+
+    scale  = [lp[0] - fp[0], lp[1] - fp[1], lp[2] - fp[2]]
+    offset = [fp[0], fp[1], fp[2]]
+    scale[axis]  = 0
+    offset[axis] = lp[axis]
+
+    return unitGrid(xs, ys, axis) * scale + offset
+
+def gridBuffer(fp, lp, segments, basis, origin, out=None):
+    """Flat float32 xyz buffer of the world space vertices of the grid
+    spanned by the plane space points fp and lp
+
+    Folds the extents of the grid and the plane basis into one affine map
+    of the memoized unit grid, written straight into out when it has the
+    size of the grid. Returns the buffer written."""
+    xs, ys = gridSubdivisions(segments)
+    key = xs, ys
+    unit = _grid_coords.get(key)
+
+    if unit is None:
+        # the plane coordinates of the unit grid in the precision of the
+        # buffer, so the map runs in float32 throughout
+        _grid_coords.clear()
+        unit = _grid_coords[key] = np.ascontiguousarray(unitGrid(xs, ys)[:, :2], dtype=np.float32)
+
+    basis = np.asarray(basis, dtype=np.float64)
+    matrix = basis[:2] * ((lp[0] - fp[0],), (lp[1] - fp[1],))
+    offset = np.dot((fp[0], fp[1], lp[2]), basis) + origin
+
+    if out is None or len(out) != 3 * len(unit):
+        out = np.empty(3 * len(unit), dtype=np.float32)
+
+    co = out.reshape(-1, 3)
+    np.matmul(unit, matrix.astype(np.float32), out=co)
+    co += offset.astype(np.float32)
+    return out
+
+def gridFaces(segments):
+    """(xs*ys, 4) array of the quads of a grid"""
+    xs, ys = gridSubdivisions(segments)
+
+    i = (np.arange(ys)[:, None] * (xs + 1) + np.arange(xs)).ravel()
+    return np.column_stack((i, i + 1, i + xs + 2, i + xs + 1))
+
+def cylinderPoints(center, rim, height, segments, axis=2):
+    """Bottom ring followed by the top ring lifted to height"""
+    ring = ringPoints(center, rim, segments, axis)
+    top = ring.copy()
+    if height is not None:
+        top[:, axis] = height
+
+    return np.vstack((ring, top))
+
+def conePoints(center, rim, height, segments, axis=2):
+    """Base ring followed by the apex lifted to height above center"""
+    apex = [center[0], center[1], center[2]]
+    if height is not None:
+        apex[axis] = height
+
+    return np.vstack((ringPoints(center, rim, segments, axis), apex))
+
+def shapePointCount(kind, segments=0):
+    """Number of vertices of a shape"""
+    if kind in {'CIRCLE', 'ELLIPSE', 'NGON'}:
+        return segments
+    elif kind in {'ARC', 'CONE'}:
+        return segments + 1
+    elif kind == 'CYLINDER':
+        return 2 * segments
+    elif kind == 'GRID':
+        xs, ys = gridSubdivisions(segments)
+        return (xs + 1) * (ys + 1)
+
+    return SHAPE_POINTS[kind]
+
+def shapeFaces(kind, segments=0):
+    """Faces of a mesh shape, memoized per segment count"""
+    if kind == 'GRID':
+        # too big to keep around, only built when the subdivisions change
+        return gridFaces(segments)
+
+    faces = _shape_faces.get(kind) or _shape_faces.get((kind, segments))
+    if faces is not None:
+        return faces
+
+    n = segments
+    faces = [tuple(range(n - 1, -1, -1))]
+
+    if kind == 'CYLINDER':
+        faces.append(tuple(range(n, 2 * n)))
+        faces.extend((i, (i + 1) % n, n + (i + 1) % n, n + i) for i in range(n))
+    else:
+        faces.extend((i, (i + 1) % n, n) for i in range(n))
+
+    _shape_faces[kind, segments] = faces
+    return faces
+
+def shapeUVs(kind, segments=0):
+    """Per vertex texture coordinates of the flat mesh shapes, None for
+    the others"""
+    if kind == 'PLANE':
+        return np.array(((0,0), (1,0), (1,1), (0,1)), dtype=np.float64)
+    elif kind == 'GRID':
+        xs, ys = gridSubdivisions(segments)
+        return unitGrid(xs, ys)[:, :2]
+    return None
+
+def shapeMeshArrays(kind, segments=0):
+    """meshArrays() of a mesh shape with every vertex at the origin"""
+    verts = np.zeros((shapePointCount(kind, segments), 3))
+    return meshArrays(verts, shapeFaces(kind, segments), shapeUVs(kind, segments))
+
+def shapePoints(kind, points, axis=2, segments=32):
+    """Expand the points of a shape into its vertices
+
+    `points` are the clicked points, optionally followed by the cursor
+    while the shape is still being drawn; missing points collapse onto
+    the last one."""
+    if kind in {'RECTANGLE', 'PLANE'}:
+        return rectanglePoints(points[0], points[1], axis)
+    elif kind == 'CUBE':
+        height = points[2][axis] if len(points) > 2 else None
+        return cubePoints(points[0], points[1], height, axis)
+    elif kind == 'GRID':
+        return gridPoints(points[0], points[1], segments, axis)
+    elif kind in {'CIRCLE', 'NGON'}:
+        return ringPoints(points[0], points[1], segments, axis)
+    elif kind == 'ELLIPSE':
+        return ellipsePoints(points[0], points[1], segments, axis)
+    elif kind == 'ARC':
+        end = points[2] if len(points) > 2 else None
+        return arcPoints(points[0], points[1], end, segments, axis)
+    elif kind in {'CYLINDER', 'CONE'}:
+        height = points[2][axis] if len(points) > 2 else None
+        if kind == 'CYLINDER':
+            return cylinderPoints(points[0], points[1], height, segments, axis)
+        return conePoints(points[0], points[1], height, segments, axis)
+
+    count = SHAPE_POINTS[kind]
+    points = list(points[:count])
+    points += [points[-1]] * (count - len(points))
+
+    return [(p[0], p[1], p[2]) for p in points]
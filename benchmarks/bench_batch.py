@@ -0,0 +1,57 @@
+"""Batch functions against the scalar per-point path they replace
+
+Projects n region coordinates onto a plane, once with view3d_utils and
+rayPlaneIntersection per point and once with regionPlaneIntersectionBatch.
+The scalar path runs on the stand-in Vector, which is slower than Blender's
+own, so past --scalar-limit points its time is extrapolated from the first
+ones and marked with a *.
+
+    python benchmarks/bench_batch.py [--sizes 1000 100000 1000000]
+"""
+import argparse
+
+import numpy as np
+
+import harness
+import blender_stubs as stubs
+from bpy_extras import view3d_utils
+from mathutils import Vector
+
+import InteractiveDraw as idt
+import InteractiveDrawShapes as shapes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--scalar-limit', type=int, default=20000,
+                        help="most points the scalar path is actually run on")
+    args = parser.parse_args()
+
+    region, rv3d = stubs.Region(), stubs.perspectiveView()
+    o, N = Vector((0, 0, 0)), Vector((0, 0, 1))
+    rows = []
+
+    for n in args.sizes:
+        rng = np.random.RandomState(n)
+        coords = rng.uniform(0, 1, (n, 2)) * (region.width, region.height)
+        sample = coords[:args.scalar_limit].tolist()
+
+        def scalar():
+            for coord in sample:
+                origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
+                vector = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
+                idt.rayPlaneIntersection(origin, vector, o, N)
+
+        def batch():
+            shapes.regionPlaneIntersectionBatch(coords, region.width, region.height,
+                                                rv3d.perspective_matrix, rv3d.view_matrix, o, N)
+
+        scalar_time = harness.best(scalar, repeat=1) * n / len(sample)
+        batch_time = harness.best(batch, repeat=3)
+        rows.append((n, "%.1f%s" % (scalar_time * 1000, "*" if n > len(sample) else ""),
+                     "%.2f" % (batch_time * 1000), "%.0fx" % (scalar_time / batch_time)))
+
+    harness.table(("points", "scalar ms", "batch ms", "speedup"), rows)
+
+if __name__ == "__main__":
+    main()
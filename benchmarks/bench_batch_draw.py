@@ -0,0 +1,50 @@
+"""Batch drawing shape records of growing count
+
+Builds n rectangles into one curve and n planes into one mesh with
+batchDrawShapes, from records read off a .npy file like a procedural
+layout would write them.
+
+    python benchmarks/bench_batch_draw.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+import harness
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    rows = []
+
+    for n in args.sizes:
+        corners = np.random.RandomState(n).uniform(-100, 100, (n, 2, 3))
+        corners[:, :, 2] = 0
+        path = os.path.join(directory, "shapes_%d.npy" % n)
+        np.save(path, corners)
+
+        for kind in ('RECTANGLE', 'PLANE'):
+            def draw():
+                stubs.reset()
+                records = idt.loadShapeRecords(path, kind)
+                draw.objects = idt.batchDrawShapes(stubs.Scene(), records)
+
+            seconds = harness.best(draw, repeat=3)
+            rows.append((n, kind, "%.1f" % (seconds * 1000), "%.2f" % (seconds * 1e6 / n),
+                         len(draw.objects)))
+
+        os.remove(path)
+
+    os.rmdir(directory)
+    harness.table(("shapes", "type", "best ms", "us/shape", "objects"), rows)
+
+if __name__ == "__main__":
+    main()
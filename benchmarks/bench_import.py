@@ -0,0 +1,50 @@
+"""Import time of the add-on and of the helpers it imports on first use
+
+Every sample is taken in a fresh interpreter, enabling the add-on only
+pays for the first column.
+
+    python benchmarks/bench_import.py [--repeat N]
+"""
+import argparse
+import subprocess
+import sys
+
+import harness
+
+SCRIPT = """
+import sys, time
+sys.path[:0] = %r
+import blender_stubs
+blender_stubs.install()
+
+start = time.perf_counter()
+import InteractiveDraw
+InteractiveDraw.register()
+enabled = time.perf_counter()
+numpy = 'numpy' in sys.modules
+InteractiveDraw.importHelpers()
+helpers = time.perf_counter()
+print(enabled - start, helpers - enabled, numpy)
+""" % (sys.path[:2],)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help="fresh interpreters to time")
+    args = parser.parse_args()
+
+    samples = []
+    for i in range(args.repeat):
+        out = subprocess.check_output([sys.executable, "-c", SCRIPT], universal_newlines=True)
+        enable, helpers, numpy = out.split()
+        samples.append((float(enable), float(helpers), numpy == 'True'))
+
+    rows = [("enable", "%.2f" % (min(s[0] for s in samples) * 1000)),
+            ("first draw", "%.2f" % (min(s[1] for s in samples) * 1000))]
+    harness.table(("import", "best ms"), rows)
+
+    if any(s[2] for s in samples):
+        print("numpy was imported while enabling the add-on")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Latency of invoking a draw operator in scenes of growing size
+
+Invoking links the new object and makes it the only selected one, which
+must not cost more with the number of objects in the scene. Only the
+first shape of a session walks the scene to learn the selection, it is
+left out of the timings.
+
+    python benchmarks/bench_invoke.py [--sizes 0 5000 50000]
+"""
+import argparse
+
+import harness
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 5000, 50000])
+    args = parser.parse_args()
+
+    operators = stubs.drawOperators(idt)
+    rows = []
+
+    for count in args.sizes:
+        for name in ('curve.idt_draw_rectangle', 'mesh.idt_draw_plane'):
+            stubs.reset()
+            scene = stubs.largeScene(count)
+            context = stubs.Context(scene=scene)
+            event = stubs.Event('MOUSEMOVE', 'NOTHING', 600, 300)
+
+            # the first shape of a session learns the selection
+            operators[name]().invoke(context, event)
+            scene.objects.iterations = 0
+
+            def invoke():
+                operators[name]().invoke(context, event)
+
+            seconds = harness.best(invoke, repeat=5)
+            rows.append((count, name, "%.3f" % (seconds * 1000), scene.objects.iterations))
+
+    harness.table(("objects", "operator", "best ms", "scene walks"), rows)
+
+if __name__ == "__main__":
+    main()
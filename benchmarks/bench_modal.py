@@ -0,0 +1,45 @@
+"""Events per second and allocations of the modal loop of every draw operator
+
+Replays a recorded style event stream, thousands of MOUSEMOVE events with
+a TIMER tick every few of them and the LEFTMOUSE clicks placing the shape,
+through invoke() and modal().
+
+    python benchmarks/bench_modal.py [--overlay] [--ortho] [--moves N]
+"""
+import argparse
+
+import harness
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+
+COORDS = [(600, 300), (700, 420), (650, 500), (560, 450)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--overlay', action='store_true', help="draw in overlay preview mode")
+    parser.add_argument('--ortho', action='store_true', help="draw in an orthographic top view")
+    parser.add_argument('--moves', type=int, default=1000, help="mouse moves between two clicks")
+    args = parser.parse_args()
+
+    view = stubs.topView if args.ortho else stubs.perspectiveView
+    rows = []
+
+    for name, cls in sorted(stubs.drawOperators(idt).items()):
+        events = stubs.shapeStream(cls, COORDS, args.moves)
+
+        def run():
+            stubs.reset()
+            context = stubs.Context(view())
+            result, count = stubs.replay(cls(use_overlay=args.overlay), context, events)
+            assert result == {'FINISHED'}, (name, result)
+
+        seconds = harness.best(run, repeat=3)
+        peak, blocks = harness.allocations(run)
+        rows.append((name, len(events), "%.0f" % (len(events) / seconds),
+                     "%.1f" % (peak / 1024.0), blocks))
+
+    harness.table(("operator", "events", "events/s", "peak KiB", "blocks left"), rows)
+
+if __name__ == "__main__":
+    main()
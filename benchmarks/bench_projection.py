@@ -0,0 +1,63 @@
+"""Cost of projecting one mouse event onto the working plane
+
+Compares the view3d_utils path every event used to take, which inverts
+the view matrices per call, with the cached IDT_view_projection. In the
+orthographic view it also times the plane affine map the operators use
+there instead of casting a ray per event.
+
+    python benchmarks/bench_projection.py [--events N]
+"""
+import argparse
+
+import harness
+import blender_stubs as stubs
+from bpy_extras import view3d_utils
+from mathutils import Vector
+
+import InteractiveDraw as idt
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20000)
+    args = parser.parse_args()
+
+    region = stubs.Region()
+    coords = [(i * 7 % region.width, i * 13 % region.height) for i in range(args.events)]
+    o, N = Vector((0, 0, 0)), Vector((0, 0, 1))
+    rows = []
+
+    for view in (stubs.perspectiveView, stubs.topView):
+        rv3d = view()
+
+        def before():
+            for coord in coords:
+                origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
+                vector = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
+                idt.rayPlaneIntersection(origin, vector, o, N)
+
+        def after():
+            projection = idt.IDT_view_projection(region, rv3d)
+            for coord in coords:
+                if not projection.matches(region, rv3d):
+                    projection = idt.IDT_view_projection(region, rv3d)
+                origin, vector = projection.ray(coord)
+                idt.rayPlaneIntersection(origin, vector, o, N)
+
+        def affine():
+            projection = idt.IDT_view_projection(region, rv3d)
+            A, B, C = projection.planeAffine(o, N)
+            for coord in coords:
+                A * coord[0] + B * coord[1] + C
+
+        paths = [("view3d_utils", before), ("IDT_view_projection", after)]
+        if not rv3d.is_perspective:
+            paths.append(("planeAffine", affine))
+
+        for label, fn in paths:
+            seconds = harness.best(fn, repeat=3)
+            rows.append((view.__name__, label, "%.2f" % (seconds / args.events * 1e6)))
+
+    harness.table(("view", "path", "us/event"), rows)
+
+if __name__ == "__main__":
+    main()
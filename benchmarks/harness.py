@@ -0,0 +1,45 @@
+"""Shared setup of the benchmarks
+
+The benchmarks run the add-on against the stand-ins of tests/blender_stubs.py,
+so their numbers compare builds of the add-on with each other on the same
+machine. They are not the times Blender would take."""
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tests')]
+
+import blender_stubs
+blender_stubs.install()
+
+def best(fn, repeat=5, number=1):
+    """Fastest of repeat runs of number calls of fn in seconds per call"""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        for j in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+def allocations(fn):
+    """Peak traced memory in bytes and the memory blocks fn left allocated"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return peak, blocks
+
+def table(header, rows):
+    widths = [max(len(str(row[i])) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
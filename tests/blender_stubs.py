@@ -0,0 +1,973 @@
+"""Stand-ins for the parts of Blender the Interactive Draw Tools use
+
+install() puts fake bpy, bgl, bmesh, mathutils and bpy_extras modules into
+sys.modules, so InteractiveDraw.py can be imported and its operators driven
+through invoke() and modal() without Blender. The fakes follow the Blender
+2.75 API closely enough for the operators, including its quirks: a new
+spline holds one point, foreach_set checks the length of its sequence and
+Vector * Vector is a dot product. Nothing here imports numpy at import
+time, so the import cost of the add-on can be measured with them.
+
+Times measured against these stand-ins compare builds of the add-on with
+each other, they are not the times Blender would take."""
+import math
+import sys
+import types
+
+####################
+# mathutils
+####################
+
+class Vector:
+    """Pure Python mathutils.Vector"""
+    __slots__ = ('_v',)
+
+    def __init__(self, seq=(0.0, 0.0, 0.0)):
+        self._v = [float(c) for c in seq]
+
+    def __len__(self):
+        return len(self._v)
+
+    def __iter__(self):
+        return iter(self._v)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return Vector(self._v[i])
+        return self._v[i]
+
+    def __setitem__(self, i, value):
+        self._v[i] = float(value)
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np
+        return np.array(self._v, dtype=dtype or np.float64)
+
+    def __repr__(self):
+        return "Vector((%s))" % ", ".join("%.4f" % c for c in self._v)
+
+    def __eq__(self, other):
+        if not isinstance(other, Vector):
+            return False
+        return self._v == other._v
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __neg__(self):
+        return Vector([-a for a in self._v])
+
+    def __add__(self, other):
+        return Vector([a + b for a, b in zip(self._v, other)])
+
+    def __sub__(self, other):
+        return Vector([a - b for a, b in zip(self._v, other)])
+
+    def __mul__(self, other):
+        if isinstance(other, Vector):
+            # Blender 2.7x multiplies vectors to their dot product
+            return self.dot(other)
+        return Vector([a * other for a in self._v])
+
+    def __rmul__(self, other):
+        return Vector([a * other for a in self._v])
+
+    def __truediv__(self, other):
+        return Vector([a / other for a in self._v])
+
+    def _get(i):
+        return property(lambda self: self._v[i],
+                        lambda self, value: self._v.__setitem__(i, float(value)))
+    x, y, z, w = _get(0), _get(1), _get(2), _get(3)
+    del _get
+
+    @property
+    def xyz(self):
+        return Vector(self._v[:3])
+
+    @property
+    def length(self):
+        return math.sqrt(sum(a * a for a in self._v))
+
+    def dot(self, other):
+        return sum(a * b for a, b in zip(self._v, other))
+
+    def cross(self, other):
+        a, b = self._v, list(other)
+        return Vector((a[1] * b[2] - a[2] * b[1],
+                       a[2] * b[0] - a[0] * b[2],
+                       a[0] * b[1] - a[1] * b[0]))
+
+    def normalize(self):
+        length = self.length
+        if length:
+            self._v = [a / length for a in self._v]
+
+    def normalized(self):
+        v = self.copy()
+        v.normalize()
+        return v
+
+    def copy(self):
+        return Vector(self._v)
+
+class _Columns:
+    def __init__(self, matrix):
+        self._m = matrix
+
+    def __getitem__(self, j):
+        return Vector([row[j] for row in self._m._rows])
+
+class Matrix:
+    """Pure Python mathutils.Matrix of 3x3 or 4x4 rows"""
+    __slots__ = ('_rows',)
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[float(i == j) for j in range(4)] for i in range(4)]
+        self._rows = [[float(c) for c in row] for row in rows]
+
+    @staticmethod
+    def Identity(size):
+        return Matrix([[float(i == j) for j in range(size)] for i in range(size)])
+
+    @staticmethod
+    def Translation(vector):
+        m = Matrix()
+        for i in range(3):
+            m._rows[i][3] = float(vector[i])
+        return m
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return (Vector(row) for row in self._rows)
+
+    def __getitem__(self, i):
+        return Vector(self._rows[i])
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy as np
+        return np.array(self._rows, dtype=dtype or np.float64)
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __mul__(self, other):
+        rows = self._rows
+        n = len(rows)
+
+        if isinstance(other, Matrix):
+            cols = list(zip(*other._rows))
+            return Matrix([[sum(a * b for a, b in zip(row, col)) for col in cols] for row in rows])
+
+        v = list(other)
+        if n == 4 and len(v) == 3:
+            # a point, the w of 1 is implied and no division takes place
+            v.append(1.0)
+            return Vector([sum(a * b for a, b in zip(rows[i], v)) for i in range(3)])
+
+        return Vector([sum(a * b for a, b in zip(row, v)) for row in rows])
+
+    @property
+    def col(self):
+        return _Columns(self)
+
+    @property
+    def translation(self):
+        return Vector([row[3] for row in self._rows[:3]])
+
+    def copy(self):
+        return Matrix(self._rows)
+
+    def to_3x3(self):
+        return Matrix([row[:3] for row in self._rows[:3]])
+
+    def transposed(self):
+        return Matrix(list(zip(*self._rows)))
+
+    def inverted(self):
+        n = len(self._rows)
+        a = [list(row) + [float(i == j) for j in range(n)] for i, row in enumerate(self._rows)]
+
+        for c in range(n):
+            pivot = max(range(c, n), key=lambda r: abs(a[r][c]))
+            if a[pivot][c] == 0:
+                raise ValueError("matrix does not have an inverse")
+            a[c], a[pivot] = a[pivot], a[c]
+
+            p = a[c][c]
+            a[c] = [x / p for x in a[c]]
+            for r in range(n):
+                if r != c and a[r][c]:
+                    f = a[r][c]
+                    a[r] = [x - f * y for x, y in zip(a[r], a[c])]
+
+        return Matrix([row[n:] for row in a])
+
+class KDTree:
+    """Brute force mathutils.kdtree.KDTree, numpy is imported on balance()"""
+
+    def __init__(self, size):
+        self.size = size
+        self._co = []
+        self._index = []
+        self._array = None
+        self.inserts = 0
+
+    def insert(self, co, index):
+        self._co.append(tuple(co))
+        self._index.append(index)
+        self.inserts += 1
+
+    def balance(self):
+        import numpy as np
+        self._array = np.array(self._co, dtype=np.float64).reshape(-1, 3)
+
+    def find(self, co):
+        if not self._index:
+            return None, None, None
+
+        import numpy as np
+        dist = np.sqrt(((self._array - tuple(co)) ** 2).sum(axis=1))
+        i = int(dist.argmin())
+        return Vector(self._co[i]), self._index[i], float(dist[i])
+
+    def find_range(self, co, radius):
+        if not self._index:
+            return []
+
+        import numpy as np
+        dist = np.sqrt(((self._array - tuple(co)) ** 2).sum(axis=1))
+        return [(Vector(self._co[i]), self._index[i], float(dist[i]))
+                for i in np.flatnonzero(dist <= radius)]
+
+####################
+# bpy.data
+####################
+
+class _Element:
+    """One element of an element collection, reads and writes its arrays"""
+    __slots__ = ('_elements', '_i')
+
+    def __init__(self, elements, i):
+        object.__setattr__(self, '_elements', elements)
+        object.__setattr__(self, '_i', i)
+
+    def __getattr__(self, name):
+        size = self._elements._sizes[name]
+        data = self._elements._data[name]
+        i = self._i * size
+        if size == 1:
+            return data[i]
+        return Vector(data[i:i + size])
+
+    def __setattr__(self, name, value):
+        size = self._elements._sizes[name]
+        data = self._elements._data[name]
+        i = self._i * size
+        if size == 1:
+            data[i] = value
+        else:
+            data[i:i + size] = [float(c) for c in value]
+
+class _Elements:
+    """Vertices, loops, polygons or spline points: arrays sized with add()"""
+
+    def __init__(self, **sizes):
+        self._sizes = sizes
+        self._data = dict((name, []) for name in sizes)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if not -self._count <= i < self._count:
+            raise IndexError("element index out of range")
+        return _Element(self, i % self._count)
+
+    def __iter__(self):
+        return (_Element(self, i) for i in range(self._count))
+
+    def add(self, count):
+        self._count += count
+        for name, size in self._sizes.items():
+            self._data[name].extend([0] * (count * size))
+
+    def _check(self, name, seq):
+        if name not in self._sizes:
+            raise AttributeError(name)
+        if len(seq) != self._count * self._sizes[name]:
+            raise TypeError("foreach_set(attr, seq): sequence of %d items does not fit %d elements of %s"
+                            % (len(seq), self._count, name))
+
+    def foreach_set(self, name, seq):
+        self._check(name, seq)
+        self._data[name][:] = [float(c) if self._sizes[name] > 1 or name == 'co' else int(c)
+                               for c in seq]
+
+    def foreach_get(self, name, seq):
+        self._check(name, seq)
+        seq[:] = type(seq)(seq.typecode, self._data[name]) if hasattr(seq, 'typecode') else self._data[name]
+
+class _Polygon(_Element):
+    """A polygon, also reads its corners, center and normal from the mesh"""
+    __slots__ = ()
+
+    @property
+    def vertices(self):
+        mesh = self._elements._mesh
+        start, total = self.loop_start, self.loop_total
+        return mesh.loops._data['vertex_index'][start:start + total]
+
+    def _corners(self):
+        vertices = self._elements._mesh.vertices
+        return [vertices[i].co for i in self.vertices]
+
+    @property
+    def center(self):
+        corners = self._corners()
+        return sum(corners, Vector()) / len(corners)
+
+    @property
+    def normal(self):
+        corners = self._corners()
+        normal = Vector()
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            normal = normal + a.cross(b)
+        return normal.normalized()
+
+class _Polygons(_Elements):
+    def __init__(self, mesh):
+        _Elements.__init__(self, loop_start=1, loop_total=1)
+        self._mesh = mesh
+        self.active = 0
+
+    def __getitem__(self, i):
+        _Elements.__getitem__(self, i)
+        return _Polygon(self, i % self._count)
+
+class _ID:
+    """Datablock, named and pointed to"""
+    users = 0
+
+    def as_pointer(self):
+        return id(self)
+
+class _IDCollection:
+    """bpy.data.meshes, curves or objects"""
+
+    def __init__(self, make):
+        self._make = make
+        self._items = {}
+        self.is_updated = False
+        self.created = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __getitem__(self, name):
+        return self._items[name]
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def _unique(self, name):
+        unique, n = name, 0
+        while unique in self._items:
+            n += 1
+            unique = "%s.%03d" % (name, n)
+        return unique
+
+    def new(self, name, *args, **kwargs):
+        item = self._make(*args, **kwargs)
+        item.name = self._unique(name)
+        self._items[item.name] = item
+        self.created += 1
+        return item
+
+    def remove(self, item):
+        if self._items.get(item.name) is not item:
+            raise ReferenceError("%s is not in this collection" % item.name)
+        del self._items[item.name]
+
+class _UVLayer:
+    def __init__(self, loops):
+        self.data = _Elements(uv=2)
+        self.data.add(loops)
+
+class _UVLayers:
+    def __init__(self, mesh):
+        self._mesh = mesh
+        self.active = None
+
+class _UVTextures:
+    def __init__(self, mesh):
+        self._mesh = mesh
+
+    def new(self):
+        self._mesh.uv_layers.active = _UVLayer(len(self._mesh.loops))
+
+class Mesh(_ID):
+    def __init__(self):
+        self.vertices = _Elements(co=3, normal=3)
+        self.loops = _Elements(vertex_index=1)
+        self.polygons = _Polygons(self)
+        self.uv_textures = _UVTextures(self)
+        self.uv_layers = _UVLayers(self)
+        self.is_updated = False
+        self.updates = 0
+
+    def update(self, calc_edges=False, calc_tessface=False):
+        self.updates += 1
+
+class _Splines:
+    def __init__(self):
+        self._splines = []
+        self.active = None
+
+    def __len__(self):
+        return len(self._splines)
+
+    def __getitem__(self, i):
+        return self._splines[i]
+
+    def __iter__(self):
+        return iter(list(self._splines))
+
+    def new(self, type):
+        spline = Spline(type)
+        self._splines.append(spline)
+        return spline
+
+    def remove(self, spline):
+        self._splines.remove(spline)
+        if self.active is spline:
+            self.active = None
+
+class Spline:
+    def __init__(self, type):
+        self.type = type
+        self.use_cyclic_u = False
+        # a new spline has one point
+        self.points = _Elements(co=4)
+        self.points.add(1)
+
+class Curve(_ID):
+    def __init__(self, type='CURVE'):
+        self.type = type
+        self.dimensions = '2D'
+        self.splines = _Splines()
+        self.is_updated = False
+        self.updates = 0
+
+    def update_tag(self):
+        self.updates += 1
+
+class Object(_ID):
+    def __init__(self, data):
+        self.data = data
+        self.type = 'MESH' if isinstance(data, Mesh) else 'CURVE'
+        self.mode = 'OBJECT'
+        self.select = False
+        self.matrix_world = Matrix()
+        self._scenes = []
+
+    @property
+    def users(self):
+        return len(self._scenes)
+
+    def is_visible(self, scene):
+        return scene in self._scenes
+
+    @property
+    def bound_box(self):
+        co = self.data.vertices._data['co'] if self.type == 'MESH' else []
+        if not co:
+            return [(0.0, 0.0, 0.0)] * 8
+        lo = [min(co[i::3]) for i in range(3)]
+        hi = [max(co[i::3]) for i in range(3)]
+        return [(x, y, z) for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])]
+
+class _Data:
+    def __init__(self):
+        self.meshes = _IDCollection(Mesh)
+        self.curves = _IDCollection(Curve)
+        self.objects = _IDCollection(Object)
+
+####################
+# bpy.context
+####################
+
+class _SceneObjects:
+    """scene.objects, counts how often it is walked"""
+
+    def __init__(self, scene):
+        self._scene = scene
+        self._objects = []
+        self.active = None
+        self.iterations = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __iter__(self):
+        self.iterations += 1
+        return iter(list(self._objects))
+
+    def link(self, obj):
+        if self._scene in obj._scenes:
+            raise RuntimeError("Object '%s' already in scene" % obj.name)
+        obj._scenes.append(self._scene)
+        self._objects.append(obj)
+
+    def unlink(self, obj):
+        obj._scenes.remove(self._scene)
+        self._objects.remove(obj)
+        if self.active is obj:
+            self.active = None
+
+class Scene(_ID):
+    def __init__(self):
+        self.objects = _SceneObjects(self)
+        self.cursor_location = Vector((0.0, 0.0, 0.0))
+
+class _Handle:
+    pass
+
+class WindowManager(_ID):
+    def __init__(self):
+        self.timers = []
+        self.handlers = []
+
+    def event_timer_add(self, time_step, window=None):
+        timer = _Handle()
+        timer.time_step = time_step
+        self.timers.append(timer)
+        return timer
+
+    def event_timer_remove(self, timer):
+        self.timers.remove(timer)
+
+    def modal_handler_add(self, operator):
+        self.handlers.append(operator)
+        return True
+
+    def fileselect_add(self, operator):
+        pass
+
+class Region:
+    def __init__(self, width=1280, height=720):
+        self.width = width
+        self.height = height
+
+class Area:
+    def __init__(self):
+        self.type = 'VIEW_3D'
+        self.redraws = 0
+
+    def tag_redraw(self):
+        self.redraws += 1
+
+class RegionView3D:
+    """Region data of a 3d view looking from eye at target
+
+    Builds the view and perspective matrices like Blender does, with the
+    view looking down its -z axis."""
+
+    def __init__(self, eye, target, up=(0, 0, 1), perspective=True,
+                 lens_angle=0.8, ortho_size=20.0, aspect=1280 / 720, near=0.1, far=1000.0):
+        eye, target = Vector(eye), Vector(target)
+        forward = (target - eye).normalized()
+        right = forward.cross(Vector(up)).normalized()
+        upward = right.cross(forward)
+
+        self.view_matrix = Matrix((
+            list(right) + [-right.dot(eye)],
+            list(upward) + [-upward.dot(eye)],
+            list(-forward) + [forward.dot(eye)],
+            (0, 0, 0, 1),
+        ))
+
+        if perspective:
+            f = 1 / math.tan(lens_angle / 2)
+            window = Matrix((
+                (f / aspect, 0, 0, 0),
+                (0, f, 0, 0),
+                (0, 0, (far + near) / (near - far), 2 * far * near / (near - far)),
+                (0, 0, -1, 0),
+            ))
+        else:
+            # orthographic views clip as far behind as in front
+            w, h = ortho_size / 2, ortho_size / aspect / 2
+            window = Matrix((
+                (1 / w, 0, 0, 0),
+                (0, 1 / h, 0, 0),
+                (0, 0, -1 / far, 0),
+                (0, 0, 0, 1),
+            ))
+
+        self.window_matrix = window
+        self.perspective_matrix = window * self.view_matrix
+        self.is_perspective = perspective
+        self.view_perspective = 'PERSP' if perspective else 'ORTHO'
+
+# views the tests draw in
+def perspectiveView():
+    return RegionView3D((7.0, -7.0, 5.0), (0.0, 0.0, 0.0))
+
+def topView():
+    return RegionView3D((0.0, 0.0, 10.0), (0.0, 0.0, 0.0), up=(0, 1, 0), perspective=False)
+
+def frontView():
+    return RegionView3D((0.0, -10.0, 0.0), (0.0, 0.0, 0.0), perspective=False)
+
+class Context:
+    """bpy.context of a 3d view in object mode"""
+
+    def __init__(self, region_data=None, scene=None, mode='OBJECT'):
+        self.space_data = Area()
+        self.window = _ID()
+        self.window_manager = bpy.context.window_manager
+        self.area = Area()
+        self.region = Region()
+        self.region_data = region_data or perspectiveView()
+        self.scene = scene or Scene()
+        self.mode = mode
+        self.edit_object = None
+
+    @property
+    def selected_objects(self):
+        # Blender walks every object of the scene to build this list
+        return [obj for obj in self.scene.objects if obj.select]
+
+    @property
+    def active_object(self):
+        return self.scene.objects.active
+
+    object = active_object
+
+class Event:
+    def __init__(self, type, value='NOTHING', x=0, y=0, ctrl=False, shift=False):
+        self.type = type
+        self.value = value
+        self.mouse_region_x = x
+        self.mouse_region_y = y
+        self.ctrl = ctrl
+        self.shift = shift
+
+####################
+# bpy
+####################
+
+class _Operator:
+    """bpy.types.Operator, properties are plain attributes"""
+    bl_options = set()
+
+    def __init__(self, **properties):
+        self.reports = []
+        for name, value in properties.items():
+            setattr(self, name, value)
+
+    def report(self, type, message):
+        self.reports.append((type, message))
+
+class _SpaceView3D:
+    handlers = []
+
+    @classmethod
+    def draw_handler_add(cls, callback, args, region_type, draw_type):
+        handle = callback, args
+        cls.handlers.append(handle)
+        return handle
+
+    @classmethod
+    def draw_handler_remove(cls, handle, region_type):
+        cls.handlers.remove(handle)
+
+def _property(default=None, **options):
+    # the operators read their properties as plain values
+    return default
+
+def _undo_push(message=""):
+    _undo_push.steps.append(message)
+    return {'FINISHED'}
+_undo_push.steps = []
+
+def _persistent(fn):
+    fn._bpy_persistent = True
+    return fn
+
+def _ensureExt(filepath, ext):
+    return filepath if filepath.lower().endswith(ext) else filepath + ext
+
+class _GL(types.ModuleType):
+    """bgl, every call is a no-op and every constant an int"""
+
+    def __init__(self):
+        types.ModuleType.__init__(self, 'bgl')
+        self.calls = 0
+        self._lists = 0
+
+    def glGenLists(self, count):
+        self._lists += count
+        return self._lists - count + 1
+
+    def __getattr__(self, name):
+        if name.startswith('GL_'):
+            return hash(name) & 0xffff
+
+        def call(*args):
+            self.calls += 1
+        return call
+
+bpy = types.ModuleType('bpy')
+
+def reset():
+    """Start over with empty bpy.data and context"""
+    bpy.data = _Data()
+    bpy.context = types.SimpleNamespace(window_manager=WindowManager())
+    bpy.app.driver_namespace.clear()
+    _undo_push.steps[:] = []
+    _SpaceView3D.handlers[:] = []
+
+def install():
+    """Make the stand-ins importable as bpy, bgl, bmesh, mathutils and bpy_extras"""
+    if sys.modules.get('bpy') is bpy:
+        return
+
+    bpy.types = types.ModuleType('bpy.types')
+    bpy.types.Operator = _Operator
+    bpy.types.Panel = object
+    bpy.types.SpaceView3D = _SpaceView3D
+    bpy.types.WindowManager = WindowManager
+    bpy.props = types.ModuleType('bpy.props')
+    for name in ('BoolProperty', 'EnumProperty', 'FloatProperty', 'IntProperty', 'StringProperty'):
+        setattr(bpy.props, name, _property)
+    bpy.ops = types.SimpleNamespace(ed=types.SimpleNamespace(undo_push=_undo_push))
+    bpy.app = types.SimpleNamespace(
+        driver_namespace={},
+        handlers=types.SimpleNamespace(scene_update_post=[], load_post=[], persistent=_persistent),
+        version=(2, 75, 0))
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+    bpy.path = types.SimpleNamespace(ensure_ext=_ensureExt)
+    reset()
+
+    mathutils = types.ModuleType('mathutils')
+    mathutils.Vector = Vector
+    mathutils.Matrix = Matrix
+    mathutils.kdtree = types.ModuleType('mathutils.kdtree')
+    mathutils.kdtree.KDTree = KDTree
+
+    bpy_extras = types.ModuleType('bpy_extras')
+    bpy_extras.view3d_utils = types.ModuleType('bpy_extras.view3d_utils')
+    bpy_extras.view3d_utils.region_2d_to_vector_3d = region_2d_to_vector_3d
+    bpy_extras.view3d_utils.region_2d_to_origin_3d = region_2d_to_origin_3d
+
+    bmesh = types.ModuleType('bmesh')
+    bmesh.from_edit_mesh = _fromEditMesh
+    bmesh.update_edit_mesh = lambda mesh, tessface=True, destructive=True: None
+    bmesh.ops = types.SimpleNamespace(delete=_bmeshDelete)
+
+    sys.modules.update({
+        'bpy' : bpy,
+        'bpy.types' : bpy.types,
+        'bpy.props' : bpy.props,
+        'bgl' : _GL(),
+        'bmesh' : bmesh,
+        'mathutils' : mathutils,
+        'mathutils.kdtree' : mathutils.kdtree,
+        'bpy_extras' : bpy_extras,
+        'bpy_extras.view3d_utils' : bpy_extras.view3d_utils,
+    })
+
+####################
+# bmesh
+####################
+
+class _BMElements(list):
+    active = None
+
+    def new(self, arg):
+        element = types.SimpleNamespace(co=Vector(arg), select=False) if self.vertex else \
+                  types.SimpleNamespace(verts=list(arg), select=False)
+        self.append(element)
+        return element
+
+class BMesh:
+    def __init__(self):
+        self.verts = _BMElements()
+        self.verts.vertex = True
+        self.faces = _BMElements()
+        self.faces.vertex = False
+
+def _fromEditMesh(mesh):
+    if not hasattr(mesh, 'bmesh'):
+        mesh.bmesh = BMesh()
+    return mesh.bmesh
+
+def _bmeshDelete(bm, geom=(), context=1):
+    geom = set(map(id, geom))
+    bm.verts[:] = [v for v in bm.verts if id(v) not in geom]
+    bm.faces[:] = [f for f in bm.faces if not any(id(v) in geom for v in f.verts)]
+
+####################
+# Scenes
+####################
+
+def largeScene(count, selected=3):
+    """A scene of count objects sharing one mesh, the first few selected"""
+    scene = Scene()
+    mesh = bpy.data.meshes.new("Mesh")
+    for i in range(count):
+        obj = bpy.data.objects.new("Object.%d" % i, mesh)
+        obj.select = i < selected
+        scene.objects.link(obj)
+    if count:
+        scene.objects.active = scene.objects._objects[0]
+    return scene
+
+####################
+# bpy_extras.view3d_utils
+####################
+
+# copied from Blender 2.75 so the tests compare against what it does
+def region_2d_to_vector_3d(region, rv3d, coord):
+    viewinv = rv3d.view_matrix.inverted()
+    if rv3d.is_perspective:
+        persinv = rv3d.perspective_matrix.inverted()
+
+        out = Vector(((2.0 * coord[0] / region.width) - 1.0,
+                      (2.0 * coord[1] / region.height) - 1.0,
+                      -0.5
+                      ))
+
+        w = out.dot(persinv[3].xyz) + persinv[3][3]
+
+        view_vector = ((persinv * out) / w) - viewinv.translation
+    else:
+        view_vector = -viewinv.col[2].xyz
+
+    view_vector.normalize()
+
+    return view_vector
+
+def region_2d_to_origin_3d(region, rv3d, coord, clamp=None):
+    viewinv = rv3d.view_matrix.inverted()
+
+    if rv3d.is_perspective:
+        origin_start = viewinv.translation.copy()
+    else:
+        persmat = rv3d.perspective_matrix.copy()
+        dx = (2.0 * coord[0] / region.width) - 1.0
+        dy = (2.0 * coord[1] / region.height) - 1.0
+        persinv = persmat.inverted()
+        origin_start = ((persinv.col[0].xyz * dx) +
+                        (persinv.col[1].xyz * dy) +
+                        persinv.translation)
+
+        if rv3d.view_perspective != 'CAMERA':
+            # this value is scaled to the far clip already
+            origin_offset = persinv.col[2].xyz
+            if clamp is not None:
+                if clamp < 0.0:
+                    origin_offset.negate()
+                    clamp = -clamp
+                if origin_offset.length > clamp:
+                    origin_offset.length = clamp
+
+            origin_start -= origin_offset
+
+    return origin_start
+
+####################
+# Event streams
+####################
+
+def moveTo(start, end, steps):
+    """MOUSEMOVE events from start to end, each followed by a timer tick
+    every few events like the 60Hz timer would"""
+    events = []
+    for i in range(1, steps + 1):
+        x = int(round(start[0] + (end[0] - start[0]) * i / steps))
+        y = int(round(start[1] + (end[1] - start[1]) * i / steps))
+        events.append(Event('MOUSEMOVE', x=x, y=y))
+        if i % 4 == 0 or i == steps:
+            events.append(Event('TIMER'))
+    return events
+
+def clickStream(coords, moves=16):
+    """Events placing a click at every region coordinate"""
+    events = []
+    last = coords[0]
+    for coord in coords:
+        events.extend(moveTo(last, coord, moves))
+        events.append(Event('LEFTMOUSE', 'PRESS', *coord))
+        events.append(Event('LEFTMOUSE', 'RELEASE', *coord))
+        last = coord
+    return events
+
+def strokeStream(coords, moves=16):
+    """Events dragging a stroke through the region coordinates"""
+    events = moveTo(coords[0], coords[0], 1)
+    events.append(Event('LEFTMOUSE', 'PRESS', *coords[0]))
+    last = coords[0]
+    for coord in coords[1:]:
+        events.extend(moveTo(last, coord, moves))
+        last = coord
+    events.append(Event('LEFTMOUSE', 'RELEASE', *last))
+    return events
+
+def polygonStream(coords, moves=16):
+    """Events clicking every corner and closing the polygon with Enter"""
+    events = clickStream(coords, moves)
+    events.append(Event('RET', 'PRESS'))
+    return events
+
+def replay(operator, context, events):
+    """Invoke operator and feed it the events until it is done
+
+    Returns the result of the call that ended it and the number of events
+    it took."""
+    start = events[0]
+    result = operator.invoke(context, Event('MOUSEMOVE', x=start.mouse_region_x, y=start.mouse_region_y))
+    if 'RUNNING_MODAL' not in result:
+        return result, 0
+
+    for n, event in enumerate(events, 1):
+        result = operator.modal(context, event)
+        if 'RUNNING_MODAL' not in result and 'PASS_THROUGH' not in result:
+            return result, n
+
+    return result, len(events)
+
+def drawOverlays(context):
+    """Run the draw callbacks, like a redraw of the viewport"""
+    for callback, args in list(_SpaceView3D.handlers):
+        callback(*args)
+
+def shapeStream(cls, coords, moves=16):
+    """Events drawing one shape with the draw operator cls"""
+    if cls._shape == 'STROKE':
+        return strokeStream(coords, moves)
+    elif cls._shape == 'POLYGON':
+        return polygonStream(coords, moves)
+    return clickStream(coords[:cls._max_clicks], moves)
+
+def drawOperators(module):
+    """The draw operator classes of the add-on module by bl_idname"""
+    module.register()
+    return dict((cls.bl_idname, cls) for cls in module._classes
+                if getattr(cls, '_shape', None) is not None)
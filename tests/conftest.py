@@ -0,0 +1,9 @@
+import os
+import sys
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.dirname(TESTS), TESTS]
+
+# InteractiveDraw.py imports bpy, the tests run it against stand-ins
+import blender_stubs
+blender_stubs.install()
@@ -0,0 +1,43 @@
+"""The batch functions agree with the scalar path they replace"""
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+from bpy_extras import view3d_utils
+from mathutils import Vector
+
+import InteractiveDraw as idt
+import InteractiveDrawShapes as shapes
+
+def test_ray_plane_intersection_matches_scalar():
+    rng = np.random.RandomState(4)
+    P0 = rng.uniform(-10, 10, (200, 3))
+    V = rng.uniform(-1, 1, (200, 3))
+    # a few rays parallel to the plane
+    V[::50, 2] = 0
+    o, N = (0.0, 0.0, 1.5), (0.0, 0.0, 1.0)
+
+    hits, valid = shapes.rayPlaneIntersectionBatch(P0, V, o, N)
+
+    for p, v, hit, ok in zip(P0, V, hits, valid):
+        expected = idt.rayPlaneIntersection(Vector(p), Vector(v), Vector(o), Vector(N))
+        if expected is None:
+            assert not ok and np.isnan(hit).all()
+        else:
+            assert ok and np.allclose(hit, expected)
+
+@pytest.mark.parametrize('view', [stubs.perspectiveView, stubs.topView, stubs.frontView])
+def test_region_plane_intersection_matches_view3d_utils(view):
+    region, rv3d = stubs.Region(), view()
+    coords = [(0, 0), (640, 360), (1279, 719), (100, 600), (900, 50)]
+    o, N = Vector((0, 0.5, 0.25)), Vector((0.2, -0.6, 1)).normalized()
+
+    hits, valid = shapes.regionPlaneIntersectionBatch(
+        coords, region.width, region.height, rv3d.perspective_matrix, rv3d.view_matrix,
+        o, N, rv3d.is_perspective)
+
+    assert valid.all()
+    for coord, hit in zip(coords, hits):
+        origin = view3d_utils.region_2d_to_origin_3d(region, rv3d, coord)
+        vector = view3d_utils.region_2d_to_vector_3d(region, rv3d, coord)
+        assert np.allclose(hit, idt.rayPlaneIntersection(origin, vector, o, N))
@@ -0,0 +1,150 @@
+"""Batch drawing: reading shape records and building them in bulk"""
+import json
+
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+import InteractiveDrawShapes as shapes
+
+def splinePoints(spline):
+    co = [0.0] * (4 * len(spline.points))
+    spline.points.foreach_get("co", co)
+    return np.array(co).reshape(-1, 4)[:, :3]
+
+def meshPoints(mesh):
+    co = [0.0] * (3 * len(mesh.vertices))
+    mesh.vertices.foreach_get("co", co)
+    return np.array(co).reshape(-1, 3)
+
+@pytest.fixture
+def scene():
+    stubs.reset()
+    return stubs.Scene()
+
+@pytest.mark.parametrize('wrapped', [False, True])
+def test_json_records(tmp_path, wrapped):
+    records = [
+        {'type' : 'rectangle', 'points' : [[0, 0, 0], [1, 2, 0]]},
+        {'type' : 'CUBE', 'points' : [[0, 0, 0], [1, 1, 0], [1, 1, 3]], 'plane' : 'XY'},
+    ]
+    path = tmp_path / 'shapes.json'
+    path.write_text(json.dumps({'shapes' : records} if wrapped else records))
+
+    assert idt.loadShapeRecords(str(path)) == records
+
+def test_csv_records(tmp_path):
+    path = tmp_path / 'shapes.csv'
+    path.write_text(
+        "# type, plane, points\n"
+        "LINE,XZ,0,0,0,1,0,1\n"
+        "\n"
+        "TRIANGLE,,0,0,0,1,0,0,0,1,0\n")
+
+    records = idt.loadShapeRecords(str(path), plane='YZ')
+    assert [r['type'] for r in records] == ['LINE', 'TRIANGLE']
+    # an empty plane column falls back to the default plane
+    assert [r['plane'] for r in records] == ['XZ', 'YZ']
+    assert records[0]['points'] == [[0, 0, 0], [1, 0, 1]]
+    assert len(records[1]['points']) == 3
+
+@pytest.mark.parametrize('shape', [(4, 2, 3), (4, 6)])
+def test_npy_records(tmp_path, shape):
+    path = tmp_path / 'shapes.npy'
+    np.save(str(path), np.arange(24, dtype=np.float64).reshape(shape))
+
+    records = idt.loadShapeRecords(str(path), kind='PLANE', plane='XZ')
+    assert len(records) == 4
+    assert all(r['type'] == 'PLANE' and r['plane'] == 'XZ' for r in records)
+    assert np.array_equal(records[1]['points'], [[6, 7, 8], [9, 10, 11]])
+
+def test_unsupported_file_is_refused(tmp_path):
+    with pytest.raises(ValueError):
+        idt.loadShapeRecords(str(tmp_path / 'shapes.txt'))
+
+def test_records_are_drawn_on_their_plane(scene):
+    objects = idt.batchDrawShapes(scene, [
+        {'type' : 'RECTANGLE', 'points' : [(0, 0, 0), (1, 1, 1)], 'plane' : 'XZ'},
+        {'type' : 'RECTANGLE', 'points' : [(0, 0, 0), (1, 1, 1)], 'plane' : 'yz'},
+        {'type' : 'RECTANGLE', 'points' : [(0, 0, 0), (1, 1, 1)]},
+    ])
+
+    splines = objects[0].data.splines
+    expected = [shapes.rectanglePoints((0, 0, 0), (1, 1, 1), axis) for axis in (1, 0, 2)]
+    for spline, points in zip(splines, expected):
+        assert np.allclose(splinePoints(spline), points)
+
+def test_open_and_cyclic_splines(scene):
+    objects = idt.batchDrawShapes(scene, [
+        {'type' : 'ARC', 'points' : [(0, 0, 0), (1, 0, 0), (0, 1, 0)], 'segments' : 8},
+        {'type' : 'LINE', 'points' : [(0, 0, 0), (1, 0, 0)]},
+        {'type' : 'CIRCLE', 'points' : [(0, 0, 0), (1, 0, 0)], 'segments' : 12},
+    ])
+
+    splines = objects[0].data.splines
+    assert [s.use_cyclic_u for s in splines] == [False, True, True]
+    assert [len(s.points) for s in splines] == [9, 2, 12]
+    assert objects[0].data.dimensions == '3D'
+
+def test_mesh_records_share_one_mesh(scene):
+    objects = idt.batchDrawShapes(scene, [
+        {'type' : 'PLANE', 'points' : [(0, 0, 0), (1, 1, 0)]},
+        {'type' : 'CUBE', 'points' : [(2, 0, 0), (3, 1, 0), (3, 1, 1)]},
+        {'type' : 'GRID', 'points' : [(4, 0, 0), (5, 1, 0)], 'segments' : [3, 2]},
+    ])
+
+    assert len(objects) == 1
+    mesh = objects[0].data
+    assert len(mesh.vertices) == 4 + 8 + 4 * 3
+    assert len(mesh.polygons) == 1 + 6 + 3 * 2
+
+    # the faces of every shape point at its own vertices
+    vertex_index = [0] * len(mesh.loops)
+    mesh.loops.foreach_get("vertex_index", vertex_index)
+    co = meshPoints(mesh)
+    assert co[vertex_index[:4]][:, 0].max() <= 1
+    assert co[vertex_index[4:28]][:, 0].min() >= 2
+
+def test_curves_and_meshes_make_two_objects(scene):
+    objects = idt.batchDrawShapes(scene, [
+        {'type' : 'QUAD', 'points' : [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)]},
+        {'type' : 'CONE', 'points' : [(0, 0, 0), (1, 0, 0), (0, 0, 2)], 'segments' : 6},
+    ], name='Layout')
+
+    assert [obj.type for obj in objects] == ['CURVE', 'MESH']
+    assert scene.objects._objects == objects
+    assert all(obj.name == 'Layout' or obj.name.startswith('Layout.') for obj in objects)
+
+def test_unknown_type_is_refused(scene):
+    with pytest.raises(ValueError):
+        idt.batchDrawShapes(scene, [{'type' : 'HEXAGRAM', 'points' : [(0, 0, 0)]}])
+    assert not scene.objects._objects
+
+def test_operator_reports_a_bad_file(tmp_path):
+    stubs.reset()
+    idt.register()
+    try:
+        operator = idt.IDT_batch_draw(filepath=str(tmp_path / 'missing.json'))
+        assert operator.execute(stubs.Context()) == {'CANCELLED'}
+    finally:
+        idt.unregister()
+
+def test_hundred_thousand_shapes_make_one_object(tmp_path, scene):
+    count = 100000
+    corners = np.random.RandomState(0).uniform(-100, 100, (count, 2, 3))
+    corners[:, :, 2] = 0
+    path = tmp_path / 'plan.npy'
+    np.save(str(path), corners)
+
+    records = idt.loadShapeRecords(str(path), kind='PLANE')
+    objects = idt.batchDrawShapes(scene, records)
+
+    assert len(objects) == 1
+    mesh = objects[0].data
+    assert len(mesh.vertices) == 4 * count
+    assert len(mesh.polygons) == count
+    # the mesh is filled in one go
+    assert mesh.updates == 1
+    assert np.allclose(meshPoints(mesh)[-4:], shapes.rectanglePoints(*corners[-1]))
@@ -0,0 +1,38 @@
+"""IDT_click_buffer keeps the clicks and the cursor in one array"""
+import numpy as np
+
+import InteractiveDraw as idt
+
+def test_push_keeps_the_cursor_as_a_click():
+    clicks = idt.IDT_click_buffer(2)
+    clicks.setCursor((1, 2, 3))
+    clicks.push()
+    clicks.setCursor((4, 5, 6))
+
+    assert len(clicks) == 1
+    assert list(clicks.last()) == [1, 2, 3]
+    assert clicks.points().tolist() == [[1, 2, 3], [4, 5, 6]]
+
+def test_growing_while_a_view_is_held():
+    clicks = idt.IDT_click_buffer(1)
+    clicks.setCursor((1, 1, 1))
+    view = clicks.points()
+
+    for i in range(10):
+        clicks.push()
+        clicks.setCursor((i, i, i))
+
+    # the held view keeps the points it had
+    assert view.tolist() == [[1, 1, 1]]
+    assert len(clicks.points()) == 11
+    assert np.allclose(clicks.points()[1:, 0], range(10))
+
+def test_clear_keeps_the_cursor():
+    clicks = idt.IDT_click_buffer(2)
+    clicks.setCursor((1, 2, 3))
+    clicks.push()
+    clicks.setCursor((7, 8, 9))
+    clicks.clear()
+
+    assert len(clicks) == 0
+    assert clicks.points().tolist() == [[7, 8, 9]]
@@ -0,0 +1,63 @@
+"""The add-on imports without numpy, its public functions import it themselves
+
+Every check runs in a fresh interpreter, the test session has imported
+numpy long before."""
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+def run(code, tmpdir=None):
+    script = textwrap.dedent("""
+        import sys
+        sys.path[:0] = [%r, %r]
+        import blender_stubs
+        blender_stubs.install()
+    """) % (os.path.dirname(TESTS), TESTS) + textwrap.dedent(code)
+    subprocess.check_call([sys.executable, "-c", script], cwd=str(tmpdir or TESTS))
+
+def test_import_and_register_leave_numpy_alone():
+    run("""
+        import InteractiveDraw
+        InteractiveDraw.register()
+        assert 'numpy' not in sys.modules
+        assert 'InteractiveDrawShapes' not in sys.modules
+        InteractiveDraw.unregister()
+    """)
+
+ENTRY_POINTS = {
+    'batchDrawShapes' : """
+        objects = InteractiveDraw.batchDrawShapes(blender_stubs.Scene(), [
+            {'type' : 'RECTANGLE', 'points' : [(0, 0, 0), (1, 1, 0)]},
+            {'type' : 'CUBE', 'points' : [(0, 0, 0), (1, 1, 0), (1, 1, 1)]},
+        ])
+        assert len(objects) == 2
+    """,
+    'loadShapeRecords' : """
+        assert len(InteractiveDraw.loadShapeRecords('shapes.npy')) == 3
+    """,
+    'meshFromArrays' : """
+        mesh = blender_stubs.bpy.data.meshes.new("Quad")
+        InteractiveDraw.meshFromArrays(mesh, [(0, 0, 0), (1, 0, 0), (1, 1, 0)], [(0, 1, 2)])
+        assert len(mesh.polygons) == 1
+    """,
+    'IDT_click_buffer' : """
+        clicks = InteractiveDraw.IDT_click_buffer(2)
+        clicks.setCursor((1, 2, 3))
+        assert clicks.points().tolist() == [[1, 2, 3]]
+    """,
+    'IDT_working_plane' : """
+        plane = InteractiveDraw.IDT_working_plane.fromAxis(2, (0, 0, 1))
+        assert plane.toWorld([(1, 2, 0)]).tolist() == [[1, 2, 1]]
+    """,
+}
+
+@pytest.mark.parametrize('name', sorted(ENTRY_POINTS))
+def test_entry_point_imports_what_it_needs(name, tmpdir):
+    np.save(str(tmpdir.join('shapes.npy')), np.zeros((3, 2, 3)))
+    run("import InteractiveDraw\n" + textwrap.dedent(ENTRY_POINTS[name]), tmpdir)
@@ -0,0 +1,70 @@
+"""Drawing into a scene of 50k objects only touches the selected ones"""
+import time
+
+import pytest
+
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+
+OPERATORS = stubs.drawOperators(idt)
+
+COORDS = [(600, 300), (700, 420)]
+
+def selection(scene):
+    return [obj for obj in scene.objects._objects if obj.select]
+
+def invokeLatency(name, count, repeat=5):
+    """Best latency of invoking name after the first shape of the session
+    in a scene of count objects, and the scene walks it took"""
+    stubs.reset()
+    scene = stubs.largeScene(count)
+    context = stubs.Context(scene=scene)
+    event = stubs.Event('MOUSEMOVE', 'NOTHING', *COORDS[0])
+
+    assert OPERATORS[name]().invoke(context, event) == {'RUNNING_MODAL'}
+    scene.objects.iterations = 0
+
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        OPERATORS[name]().invoke(context, event)
+        latency = time.perf_counter() - start
+        best = latency if best is None else min(best, latency)
+
+    return best, scene.objects.iterations
+
+@pytest.mark.parametrize('name', ['curve.idt_draw_rectangle', 'mesh.idt_draw_plane'])
+def test_invoke_does_not_walk_the_scene(name):
+    empty, walks = invokeLatency(name, 0)
+    large, walks = invokeLatency(name, 50000)
+
+    assert walks == 0
+    # walking 50k objects in Python takes a couple of milliseconds, well
+    # over the latency in an empty scene
+    assert large < 2 * empty + 0.001
+
+def test_first_shape_learns_the_selection():
+    stubs.reset()
+    scene = stubs.largeScene(50000)
+    context = stubs.Context(scene=scene)
+    before = selection(scene)
+
+    OPERATORS['curve.idt_draw_rectangle']().invoke(context, stubs.Event('MOUSEMOVE', 'NOTHING', *COORDS[0]))
+    assert scene.objects.iterations == 1
+    assert not any(obj.select for obj in before)
+    assert selection(scene) == [scene.objects.active]
+
+def test_finished_shapes_are_the_only_selection():
+    stubs.reset()
+    scene = stubs.largeScene(50000)
+    context = stubs.Context(scene=scene)
+
+    for i in range(3):
+        operator = OPERATORS['curve.idt_draw_rectangle']()
+        assert stubs.replay(operator, context, stubs.clickStream(COORDS))[0] == {'FINISHED'}
+
+    # only the first shape walked the scene
+    assert scene.objects.iterations == 1
+    assert selection(scene) == [scene.objects.active]
+    assert len(scene.objects) == 50003
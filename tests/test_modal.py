@@ -0,0 +1,147 @@
+"""Replays event streams through modal() of every draw operator"""
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+from blender_stubs import Event
+
+import InteractiveDraw as idt
+
+OPERATORS = stubs.drawOperators(idt)
+
+# corners of a shape in region coordinates
+COORDS = [(600, 300), (700, 420), (650, 500), (560, 450)]
+
+VIEWS = [stubs.perspectiveView, stubs.topView]
+
+def groundPoint(context, coord):
+    """Where view3d_utils puts a region coordinate on the ground plane"""
+    from bpy_extras import view3d_utils
+    origin = view3d_utils.region_2d_to_origin_3d(context.region, context.region_data, coord)
+    vector = view3d_utils.region_2d_to_vector_3d(context.region, context.region_data, coord)
+    return np.array(origin - vector * (origin.z / vector.z))
+
+def splinePoints(spline):
+    co = [0.0] * (4 * len(spline.points))
+    spline.points.foreach_get("co", co)
+    return np.array(co).reshape(-1, 4)[:, :3]
+
+def draw(name, view, **properties):
+    stubs.reset()
+    context = stubs.Context(view())
+    operator = OPERATORS[name](**properties)
+    cls = OPERATORS[name]
+    result, count = stubs.replay(operator, context, stubs.shapeStream(cls, COORDS))
+    return context, operator, result
+
+@pytest.mark.parametrize('use_overlay', [False, True])
+@pytest.mark.parametrize('view', VIEWS)
+@pytest.mark.parametrize('name', sorted(OPERATORS))
+def test_every_operator_finishes(name, view, use_overlay):
+    context, operator, result = draw(name, view, use_overlay=use_overlay)
+
+    assert result == {'FINISHED'}
+    objects = context.scene.objects._objects
+    assert len(objects) == 1
+    assert context.scene.objects.active is objects[0]
+    assert objects[0].select
+
+    # the timer and the overlay are gone
+    assert not context.window_manager.timers
+    assert not stubs.bpy.types.SpaceView3D.handlers
+
+@pytest.mark.parametrize('use_overlay', [False, True])
+@pytest.mark.parametrize('view', VIEWS)
+def test_rectangle_corners_are_under_the_clicks(view, use_overlay):
+    context, operator, result = draw('curve.idt_draw_rectangle', view, use_overlay=use_overlay)
+
+    a, b = groundPoint(context, COORDS[0]), groundPoint(context, COORDS[1])
+    expected = [a, (b[0], a[1], 0), b, (a[0], b[1], 0)]
+
+    curve = context.scene.objects.active.data
+    assert len(curve.splines) == 1
+    assert np.allclose(splinePoints(curve.splines[0]), expected, atol=1e-6)
+
+def test_plane_vertices_are_under_the_clicks():
+    context, operator, result = draw('mesh.idt_draw_plane', stubs.topView)
+
+    a, b = groundPoint(context, COORDS[0]), groundPoint(context, COORDS[1])
+    mesh = context.scene.objects.active.data
+    co = [0.0] * (3 * len(mesh.vertices))
+    mesh.vertices.foreach_get("co", co)
+    assert np.allclose(np.array(co).reshape(-1, 3), [a, (b[0], a[1], 0), b, (a[0], b[1], 0)], atol=1e-6)
+
+@pytest.mark.parametrize('view', [stubs.topView, stubs.frontView])
+def test_cube_top_follows_the_cursor_up_the_screen(view):
+    context, operator, result = draw('mesh.idt_draw_cube', view)
+
+    assert result == {'FINISHED'}
+    mesh = context.scene.objects.active.data
+    co = [0.0] * (3 * len(mesh.vertices))
+    mesh.vertices.foreach_get("co", co)
+    co = np.array(co).reshape(-1, 3)
+
+    # the base lies in the plane facing the view, the top is raised by the
+    # distance the cursor went up the screen after the second click
+    from bpy_extras import view3d_utils
+    region, rv3d = context.region, context.region_data
+    origins = [view3d_utils.region_2d_to_origin_3d(region, rv3d, c) for c in COORDS[1:3]]
+    up = rv3d.view_matrix.inverted().col[1].xyz.normalized()
+
+    normal = np.array(operator._plane.normal)
+    heights = co.dot(normal) - co[0].dot(normal)
+    assert np.isclose(np.ptp(heights), abs((origins[1] - origins[0]).dot(up)), atol=1e-6)
+
+def test_plane_stays_put_when_the_view_turns_after_the_first_click():
+    stubs.reset()
+    context = stubs.Context(stubs.perspectiveView())
+    operator = OPERATORS['curve.idt_draw_rectangle'](working_plane='VIEW')
+    events = stubs.clickStream(COORDS[:2])
+    first = events.index(next(e for e in events if e.type == 'LEFTMOUSE' and e.value == 'RELEASE'))
+
+    assert stubs.replay(operator, context, events[:first + 1])[0] == {'RUNNING_MODAL'}
+    origin, normal = np.array(operator._plane.origin), np.array(operator._plane.normal)
+
+    # orbit round to look at the scene from the front
+    context.region_data = stubs.RegionView3D((0.5, -10.0, 1.0), (0.0, 0.0, 0.0))
+    for event in events[first + 1:]:
+        result = operator.modal(context, event)
+
+    assert result == {'FINISHED'}
+    points = splinePoints(context.scene.objects.active.data.splines[0])
+    assert np.allclose((points - origin).dot(normal), 0.0, atol=1e-6)
+
+def test_polygon_keeps_every_corner():
+    context, operator, result = draw('curve.idt_draw_polygon', stubs.topView)
+
+    spline = context.scene.objects.active.data.splines[0]
+    assert spline.use_cyclic_u
+    assert np.allclose(splinePoints(spline), [groundPoint(context, c) for c in COORDS], atol=1e-6)
+
+def test_stroke_ends_under_the_cursor():
+    context, operator, result = draw('curve.idt_draw_stroke', stubs.topView)
+
+    points = splinePoints(context.scene.objects.active.data.splines[0])
+    assert np.allclose(points[0], groundPoint(context, COORDS[0]), atol=1e-6)
+    assert np.allclose(points[-1], groundPoint(context, COORDS[-1]), atol=1e-6)
+    # straight runs are decimated to their corners
+    assert len(points) < 20
+
+def test_cancel_leaves_nothing_linked():
+    stubs.reset()
+    context = stubs.Context()
+    operator = OPERATORS['curve.idt_draw_rectangle']()
+    events = stubs.clickStream(COORDS[:1]) + [Event('ESC', 'PRESS')]
+
+    assert stubs.replay(operator, context, events)[0] == {'CANCELLED'}
+    assert not context.scene.objects._objects
+
+def test_continuous_draw_keeps_every_shape():
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    operator = OPERATORS['curve.idt_draw_line'](use_repeat=True)
+    events = stubs.clickStream(COORDS * 2) + [Event('RIGHTMOUSE', 'PRESS')]
+
+    assert stubs.replay(operator, context, events)[0] == {'CANCELLED'}
+    curve = context.scene.objects.active.data
+    assert len(curve.splines) == 4
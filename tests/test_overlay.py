@@ -0,0 +1,41 @@
+"""The overlay preview creates no datablock until the shape is finished"""
+import pytest
+
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+
+OPERATORS = stubs.drawOperators(idt)
+
+COORDS = [(600, 300), (700, 420), (650, 500), (560, 450)]
+
+def datablocks():
+    data = stubs.bpy.data
+    return len(data.objects) + len(data.meshes) + len(data.curves)
+
+@pytest.mark.parametrize('name', sorted(OPERATORS))
+def test_no_datablock_before_finished(name):
+    stubs.reset()
+    context = stubs.Context()
+    operator = OPERATORS[name](use_overlay=True)
+    events = stubs.shapeStream(OPERATORS[name], COORDS)
+
+    # everything up to the event that finishes the shape
+    result, count = stubs.replay(operator, context, events[:-1])
+    assert result == {'RUNNING_MODAL'}
+    stubs.drawOverlays(context)
+    assert datablocks() == 0
+    assert context.area.redraws > 0
+
+    assert operator.modal(context, events[-1]) == {'FINISHED'}
+    assert len(stubs.bpy.data.objects) >= 1
+    assert len(context.scene.objects) == 1
+
+def test_cancelled_preview_leaves_no_datablock():
+    stubs.reset()
+    context = stubs.Context()
+    operator = OPERATORS['mesh.idt_draw_cube'](use_overlay=True)
+    events = stubs.clickStream(COORDS[:2]) + [stubs.Event('ESC', 'PRESS')]
+
+    assert stubs.replay(operator, context, events)[0] == {'CANCELLED'}
+    assert datablocks() == 0
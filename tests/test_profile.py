@@ -0,0 +1,107 @@
+"""Stages of the profiler time their own work only"""
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+
+OPERATORS = stubs.drawOperators(idt)
+
+class Clock:
+    """Clock that only moves when told to"""
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class Shape:
+    clock = None
+
+    def commitGeometry(self):
+        self.clock.now += 1
+        self.writeGeometry()
+
+    def writeGeometry(self):
+        self.clock.now += 4
+        self.tagUpdate()
+
+    def tagUpdate(self):
+        self.clock.now += 2
+
+def test_nested_stages_are_subtracted():
+    clock = Shape.clock = Clock()
+    profile = idt.IDT_profiler(size=8, clock=clock)
+    profile.enable((
+        ('write',  Shape, 'commitGeometry'),
+        ('write',  Shape, 'writeGeometry'),
+        ('update', Shape, 'tagUpdate'),
+    ))
+    try:
+        Shape().commitGeometry()
+        Shape().writeGeometry()
+    finally:
+        profile.disable()
+
+    # one sample per outer call, without the update nested in it
+    assert profile._count == {'ray' : 0, 'write' : 2, 'update' : 2}
+    assert list(profile._samples['write'][:2]) == [5, 4]
+    assert list(profile._samples['update'][:2]) == [2, 2]
+
+def test_disable_restores_the_methods():
+    before = [cls.__dict__[name] for stage, cls, name in idt.PROFILED_METHODS]
+    idt._profile.enable(idt.PROFILED_METHODS)
+    assert [cls.__dict__[name] for stage, cls, name in idt.PROFILED_METHODS] != before
+    idt._profile.disable()
+    assert [cls.__dict__[name] for stage, cls, name in idt.PROFILED_METHODS] == before
+
+def profiledDraw(name, **properties):
+    stubs.reset()
+    idt._profile.reset()
+    idt._profile.enable(idt.PROFILED_METHODS)
+    try:
+        cls = OPERATORS[name]
+        events = stubs.shapeStream(cls, [(600, 300), (700, 420), (650, 500)])
+        result, count = stubs.replay(cls(**properties), stubs.Context(), events)
+        assert result == {'FINISHED'}
+    finally:
+        idt._profile.disable()
+    return idt._profile.stats()
+
+def test_every_update_follows_a_write():
+    for name in ('curve.idt_draw_rectangle', 'mesh.idt_draw_plane',
+                 'curve.idt_draw_polygon', 'curve.idt_draw_stroke'):
+        stats = profiledDraw(name)
+        # a refresh before the first click has nothing to update
+        assert stats['update']['count'] > 0, name
+        assert stats['write']['count'] >= stats['update']['count'], name
+
+def test_overlay_writes_without_updates():
+    stats = profiledDraw('curve.idt_draw_rectangle', use_overlay=True)
+    assert stats['write']['count'] > 0
+    # only finishing writes the datablock
+    assert stats['update']['count'] == 1
+
+def test_shape_expansion_is_part_of_the_write(monkeypatch):
+    clock = Clock()
+    shapePoints = idt.shapes.shapePoints
+    calls = []
+
+    def expand(*args):
+        calls.append(args)
+        clock.now += 1
+        return shapePoints(*args)
+
+    monkeypatch.setattr(idt.shapes, 'shapePoints', expand)
+    profile = idt.IDT_profiler(size=1024, clock=clock)
+    profile.enable(idt.PROFILED_METHODS)
+    try:
+        cls = OPERATORS['curve.idt_draw_rectangle']
+        events = stubs.shapeStream(cls, [(600, 300), (700, 420)])
+        stubs.reset()
+        assert stubs.replay(cls(), stubs.Context(), events)[0] == {'FINISHED'}
+    finally:
+        profile.disable()
+
+    # the expansion is timed as write, once per refresh
+    count = profile._count['write']
+    assert calls and count >= len(calls)
+    assert sum(profile._samples['write'][:count]) == len(calls)
+    assert profile._count['ray'] > 0 and not any(profile._samples['ray'])
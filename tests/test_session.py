@@ -0,0 +1,59 @@
+"""State the draw session keeps between invocations"""
+import numpy as np
+
+import blender_stubs as stubs
+
+import InteractiveDraw as idt
+import InteractiveDrawShapes as shapes
+
+OPERATORS = stubs.drawOperators(idt)
+
+COORDS = [(600, 300), (700, 420)]
+
+def test_finishing_creates_no_spare_object():
+    stubs.reset()
+    context = stubs.Context()
+
+    for name in ('curve.idt_draw_rectangle', 'mesh.idt_draw_cube'):
+        cls = OPERATORS[name]
+        events = stubs.shapeStream(cls, COORDS + [(650, 500)])
+        assert stubs.replay(cls(), context, events)[0] == {'FINISHED'}
+
+    # only the drawn objects, none waiting in the pool
+    assert len(stubs.bpy.data.objects) == 2
+    assert len(stubs.bpy.data.meshes) == 1
+
+def tiltedFace(context):
+    """Active mesh object with a single active face, tilted about x"""
+    mesh = stubs.bpy.data.meshes.new("Face")
+    verts = [(-2, -2, 0), (2, -2, 0), (2, 2, 2), (-2, 2, 2)]
+    idt.fillMesh(mesh, shapes.meshArrays(verts, [(0, 1, 2, 3)]))
+    obj = stubs.bpy.data.objects.new("Face", mesh)
+    context.scene.objects.link(obj)
+    context.scene.objects.active = obj
+    return np.array(verts[2]) - verts[0]
+
+def test_face_plane_outlives_the_active_object():
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    tiltedFace(context)
+    cls = OPERATORS['curve.idt_draw_rectangle']
+
+    for i in range(2):
+        operator = cls(working_plane='FACE')
+        assert stubs.replay(operator, context, stubs.clickStream(COORDS))[0] == {'FINISHED'}
+        # the rectangle lies on the face, z rises with y
+        spline = context.scene.objects.active.data.splines[0]
+        co = np.array([p.co[:3] for p in spline.points])
+        assert np.allclose(co[:, 2], co[:, 1] * 0.5 + 1)
+
+    # the active object is now the second rectangle, a curve
+    assert context.scene.objects.active.type == 'CURVE'
+
+def test_face_plane_without_a_face_to_start_from():
+    stubs.reset()
+    context = stubs.Context()
+    operator = OPERATORS['curve.idt_draw_rectangle'](working_plane='FACE')
+
+    assert operator.invoke(context, stubs.Event('MOUSEMOVE', 'NOTHING', *COORDS[0])) == {'CANCELLED'}
+    assert operator.reports
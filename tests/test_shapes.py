@@ -0,0 +1,138 @@
+"""Regression tests of the shape kernel, these only need numpy"""
+import math
+
+import numpy as np
+import pytest
+
+import InteractiveDrawShapes as shapes
+
+PARAMETRIC = [('CIRCLE', 12), ('ELLIPSE', 12), ('NGON', 6), ('ARC', 8), ('CYLINDER', 16), ('CONE', 16), ('GRID', (4, 3))]
+FIXED = ['LINE', 'TRIANGLE', 'RECTANGLE', 'QUAD', 'PLANE', 'CUBE']
+
+CLICKS = [(1.0, 2.0, 0.0), (4.0, 6.0, 0.0), (4.0, 6.0, 3.0), (0.0, 5.0, 0.0)]
+
+
+@pytest.mark.parametrize('kind,segments', [(k, 0) for k in FIXED] + PARAMETRIC)
+def test_point_count(kind, segments):
+    points = shapes.shapePoints(kind, CLICKS, 2, segments)
+    assert len(points) == shapes.shapePointCount(kind, segments)
+
+
+def test_missing_points_collapse_onto_the_last():
+    points = shapes.shapePoints('QUAD', CLICKS[:2])
+    assert points == [CLICKS[0], CLICKS[1], CLICKS[1], CLICKS[1]]
+
+
+def test_rectangle_corners():
+    assert shapes.rectanglePoints((1, 2, 0), (4, 6, 0)) == [
+        (1, 2, 0), (4, 2, 0), (4, 6, 0), (1, 6, 0)]
+    # on the XZ plane the y coordinate is left alone
+    assert shapes.rectanglePoints((1, 5, 2), (4, 5, 6), axis=1) == [
+        (1, 5, 2), (4, 5, 2), (4, 5, 6), (1, 5, 6)]
+
+
+def test_cube_top_is_lifted_to_height():
+    points = shapes.cubePoints((0, 0, 0), (2, 3, 0), 5)
+    assert [p[2] for p in points] == [0] * 4 + [5] * 4
+    flat = shapes.cubePoints((0, 0, 0), (2, 3, 0))
+    assert [p[2] for p in flat] == [0] * 8
+
+
+def test_ring_radius_and_center():
+    ring = shapes.ringPoints((1, 1, 2), (4, 5, 2), 32)
+    assert np.allclose(np.hypot(ring[:, 0] - 1, ring[:, 1] - 1), 5)
+    assert np.allclose(ring[:, 2], 2)
+
+
+def test_ellipse_fits_the_corner():
+    ellipse = shapes.ellipsePoints((1, 1, 2), (4, -1, 2), 32)
+    assert np.allclose(((ellipse[:, 0] - 1) / 3) ** 2 + ((ellipse[:, 1] - 1) / 2) ** 2, 1)
+    assert np.allclose(ellipse[:, 2], 2)
+    assert np.allclose(ellipse.min(axis=0), (-2, -1, 2))
+    assert np.allclose(ellipse.max(axis=0), (4, 3, 2))
+    # on the XZ plane the y coordinate is left alone
+    assert np.allclose(shapes.ellipsePoints((0, 5, 0), (1, 0, 2), 8, axis=1)[:, 1], 5)
+
+
+def test_arc_ends():
+    arc = shapes.arcPoints((0, 0, 0), (1, 0, 0), (0, 2, 0), 8)
+    assert np.allclose(arc[0], (1, 0, 0))
+    assert np.allclose(arc[-1], (0, 1, 0))
+    # a full circle while the end is missing
+    full = shapes.arcPoints((0, 0, 0), (1, 0, 0), None, 8)
+    assert np.allclose(full[0], full[-1])
+
+
+def test_unit_ring_is_memoized():
+    assert shapes.unitRing(9) is shapes.unitRing(9)
+
+
+def test_grid_points_and_faces():
+    points = shapes.gridPoints((0, 0, 1), (3, 2, 1), (3, 2))
+    assert points.shape == (12, 3)
+    assert np.allclose(points[0], (0, 0, 1))
+    assert np.allclose(points[-1], (3, 2, 1))
+
+    faces = shapes.gridFaces((3, 2))
+    assert faces.shape == (6, 4)
+    assert faces.max() == 11
+    assert list(faces[0]) == [0, 1, 5, 4]
+
+
+@pytest.mark.parametrize('kind,segments', [('PLANE', 0), ('CUBE', 0)] + PARAMETRIC[4:])
+def test_faces_index_every_vertex(kind, segments):
+    count = shapes.shapePointCount(kind, segments)
+    used = set(int(i) for face in shapes.shapeFaces(kind, segments) for i in face)
+    assert used == set(range(count))
+
+
+def test_cylinder_and_cone_height():
+    cylinder = shapes.cylinderPoints((0, 0, 0), (1, 0, 0), 2, 8)
+    assert np.allclose(cylinder[8:, 2], 2)
+    cone = shapes.conePoints((0, 0, 0), (1, 0, 0), 2, 8)
+    assert np.allclose(cone[-1], (0, 0, 2))
+
+
+def test_view_axis_tolerates_rounding():
+    assert shapes.viewAxis((0, -0.99999999, 1e-8)) == 1
+    assert shapes.viewAxis((1 - 1e-9, 0, 0)) == 0
+    assert shapes.viewAxis((0.5, 0.5, math.sqrt(0.5))) == 2
+
+
+def test_mesh_arrays():
+    co, vertex_index, loop_start, loop_total, uvs = shapes.shapeMeshArrays('PLANE')
+    assert len(co) == 12
+    assert list(vertex_index) == [0, 1, 2, 3]
+    assert list(loop_start) == [0] and list(loop_total) == [4]
+    assert np.allclose(uvs.reshape(-1, 2), [(0, 0), (1, 0), (1, 1), (0, 1)])
+
+    co, vertex_index, loop_start, loop_total, uvs = shapes.shapeMeshArrays('CYLINDER', 5)
+    assert list(loop_total) == [5, 5, 4, 4, 4, 4, 4]
+    assert list(loop_start) == [0, 5, 10, 14, 18, 22, 26]
+    assert uvs is None
+
+
+def test_point_buffer():
+    assert list(shapes.pointBuffer([(1, 2, 3)], 4)) == [1, 2, 3, 1]
+    assert list(shapes.pointBuffer(np.array([(1., 2., 3.)]), 3)) == [1, 2, 3]
+
+
+def test_grid_buffer_is_the_grid_on_the_plane():
+    basis = np.array(((0, 1, 0), (0, 0, 1), (1, 0, 0)), dtype=np.float64)
+    origin = np.array((5, 0, 0))
+    expected = shapes.gridPoints((1, 2, 0), (4, 6, 0), (3, 2)).dot(basis) + origin
+
+    out = shapes.gridBuffer((1, 2, 0), (4, 6, 0), (3, 2), basis, origin)
+    assert out.dtype == np.float32
+    assert np.allclose(out.reshape(-1, 3), expected)
+
+    # a buffer of the right size is written in place, any other is replaced
+    again = shapes.gridBuffer((0, 0, 0), (1, 1, 0), (3, 2), basis, origin, out)
+    assert again is out
+    assert shapes.gridBuffer((0, 0, 0), (1, 1, 0), (4, 2), basis, origin, out) is not out
+
+
+def test_float32_points_are_passed_through():
+    points = np.zeros((4, 3), dtype=np.float32)
+    assert np.shares_memory(shapes.pointBuffer(points, 3), points)
+    assert len(shapes.pointBuffer(points, 4)) == 16
@@ -0,0 +1,195 @@
+"""Snap index: trees built on update, the mesh change signal and the object cull"""
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+from mathutils import Matrix, Vector
+
+import InteractiveDraw as idt
+import InteractiveDrawShapes as shapes
+
+OPERATORS = stubs.drawOperators(idt)
+
+def addCube(scene, location, name="Cube"):
+    """Unit cube object, its mesh is its own"""
+    mesh = stubs.bpy.data.meshes.new(name)
+    verts = shapes.cubePoints((0, 0, 0), (1, 1, 0), 1)
+    idt.fillMesh(mesh, shapes.meshArrays(verts, shapes.CUBE_FACES))
+    obj = stubs.bpy.data.objects.new(name, mesh)
+    obj.matrix_world = Matrix.Translation(location)
+    scene.objects.link(obj)
+    return obj
+
+def sceneUpdate(*meshes):
+    """What Blender does after meshes changed"""
+    stubs.bpy.data.meshes.is_updated = bool(meshes)
+    for mesh in meshes:
+        mesh.is_updated = True
+    idt.countMeshChanges(None)
+    stubs.bpy.data.meshes.is_updated = False
+    for mesh in meshes:
+        mesh.is_updated = False
+
+@pytest.fixture
+def scene():
+    stubs.reset()
+    idt.forgetSessions(None)
+    scene = stubs.Scene()
+    # a row of cubes 10 apart along x
+    for i in range(20):
+        addCube(scene, (10 * i, 0, 0), "Cube.%d" % i)
+    return scene
+
+def test_snaps_to_the_nearest_vertex(scene):
+    index = idt.IDT_snap_index()
+    index.update(scene)
+
+    assert index.snap(Vector((30.9, 1.2, 0.1)), 0.5) == Vector((31, 1, 0))
+    assert index.snap(Vector((35, 5, 5)), 0.5) is None
+
+def test_trees_are_built_on_update(scene):
+    index = idt.IDT_snap_index()
+    index.update(scene)
+    assert len(index._trees) == 20
+    trees = dict(index._trees)
+
+    # a snap only reads the trees
+    index.snap(Vector((30.9, 1.2, 0.1)), 0.5)
+    assert index._trees == trees
+
+def test_removed_objects_drop_their_trees(scene):
+    index = idt.IDT_snap_index()
+    index.update(scene)
+
+    for obj in scene.objects._objects[10:]:
+        scene.objects.unlink(obj)
+    index.update(scene)
+    assert len(index._trees) == 10
+    assert index.snap(Vector((150, 0, 0)), 0.5) is None
+
+def test_unchanged_scene_keeps_its_index(scene):
+    index = idt.IDT_snap_index()
+    index.update(scene)
+    groups, trees = index._groups, dict(index._trees)
+
+    index.update(scene)
+    assert index._groups is groups
+    assert index._trees == trees
+
+def test_large_object_only_widens_its_own_group(scene):
+    mesh = stubs.bpy.data.meshes.new("Ground")
+    verts = shapes.cubePoints((-500, -500, -1), (500, 500, -1), -1)
+    idt.fillMesh(mesh, shapes.meshArrays(verts, shapes.CUBE_FACES))
+    scene.objects.link(stubs.bpy.data.objects.new("Ground", mesh))
+    index = idt.IDT_snap_index()
+    index.update(scene)
+
+    reaches = [reach for centers, reach, entries in index._groups]
+    assert len(reaches) == 2
+    assert min(reaches) < 1
+
+    # only the ground and the cube next to the point are looked at
+    found = []
+    for centers, reach, entries in index._groups:
+        found.extend(centers.find_range(Vector((30.9, 1.2, 0.1)), 0.5 + reach))
+    assert len(found) == 2
+    assert index.snap(Vector((30.9, 1.2, 0.1)), 0.5) == Vector((31, 1, 0))
+
+def test_moved_object_keeps_its_tree(scene):
+    index = idt.IDT_snap_index()
+    index.update(scene)
+    index.snap(Vector((0, 0, 0)), 0.5)
+    tree = list(index._trees.values())[0][1]
+
+    obj = scene.objects._objects[0]
+    obj.matrix_world = Matrix.Translation((0, 0, 5))
+    index.update(scene)
+
+    assert index.snap(Vector((0, 0, 5.1)), 0.5) == Vector((0, 0, 5))
+    assert index.snap(Vector((0, 0, 0.1)), 0.5) is None
+    assert list(index._trees.values())[0][1] is tree
+
+def test_changed_mesh_rebuilds_its_tree(scene):
+    index = idt.IDT_snap_index()
+    index.update(scene)
+    assert index.snap(Vector((0, 0, 0)), 0.5) == Vector((0, 0, 0))
+
+    mesh = scene.objects._objects[0].data
+    co = [0.0] * (3 * len(mesh.vertices))
+    mesh.vertices.foreach_get("co", co)
+    mesh.vertices.foreach_set("co", [c + 2 for c in co])
+
+    # without the signal the index trusts what it has
+    index.update(scene)
+    assert index.snap(Vector((0, 0, 0)), 0.5) == Vector((0, 0, 0))
+
+    sceneUpdate(mesh)
+    index.update(scene)
+    assert index.snap(Vector((0, 0, 0)), 0.5) is None
+    assert index.snap(Vector((2, 2, 2)), 0.5) == Vector((2, 2, 2))
+
+def test_drawing_counts_its_own_mesh(scene):
+    context = stubs.Context(stubs.topView(), scene=scene)
+    cls = OPERATORS['mesh.idt_draw_plane']
+    others = [obj.data for obj in scene.objects._objects]
+
+    operator = cls()
+    operator.invoke(context, stubs.Event('MOUSEMOVE', 'NOTHING', 600, 300))
+    changes = dict(idt._mesh_changes)
+
+    # updates while drawing count every mesh but the one being drawn
+    sceneUpdate(operator._mesh_data, *others)
+    assert operator._mesh_data.as_pointer() not in idt._mesh_changes
+    assert all(idt._mesh_changes[mesh.as_pointer()] == changes.get(mesh.as_pointer(), 0) + 1
+               for mesh in others)
+
+    for event in stubs.clickStream([(600, 300), (700, 400)]):
+        operator.modal(context, event)
+    assert idt._mesh_changes[operator._mesh_data.as_pointer()] == 1
+    assert not idt._drawing
+
+def test_operator_left_running_does_not_stop_the_count(scene):
+    context = stubs.Context(stubs.topView(), scene=scene)
+    operator = OPERATORS['mesh.idt_draw_plane']()
+    operator.invoke(context, stubs.Event('MOUSEMOVE', 'NOTHING', 600, 300))
+    # the modal went away without ever stopping
+
+    mesh = scene.objects._objects[0].data
+    sceneUpdate(mesh)
+    sceneUpdate(mesh)
+    assert idt._mesh_changes[mesh.as_pointer()] == 2
+
+def test_instances_read_their_mesh_once():
+    stubs.reset()
+    scene = stubs.largeScene(0)
+    mesh = addCube(scene, (0, 0, 0)).data
+    for i in range(2000):
+        obj = stubs.bpy.data.objects.new("Instance", mesh)
+        obj.matrix_world = Matrix.Translation((10 * (i % 50), 10 * (i // 50), 0))
+        scene.objects.link(obj)
+
+    reads = []
+    foreach_get = mesh.vertices.foreach_get
+    mesh.vertices.foreach_get = lambda *args: reads.append(args) or foreach_get(*args)
+
+    # instances share their mesh and its tree
+    index = idt.IDT_snap_index()
+    index.update(scene)
+    assert len(reads) == 1
+
+    # snapping and updating an unchanged scene read nothing
+    assert index.snap(Vector((120.1, 40, 0.9)), 0.5) == Vector((120, 40, 1))
+    assert index.snap(Vector((240, 90.9, 0.1)), 0.5) == Vector((240, 91, 0))
+    obj.matrix_world = Matrix.Translation((-10, 0, 0))
+    index.update(scene)
+    assert len(reads) == 1
+
+def test_operator_snaps_the_first_corner(scene):
+    context = stubs.Context(stubs.topView(), scene=scene)
+    operator = OPERATORS['curve.idt_draw_rectangle'](use_snap=True, snap_distance=0.5)
+    # (702, 362) is close to the corner (1, 0, 0) of the first cube
+    events = stubs.clickStream([(702, 362), (800, 500)])
+
+    assert stubs.replay(operator, context, events)[0] == {'FINISHED'}
+    spline = context.scene.objects.active.data.splines[0]
+    assert np.allclose(spline.points[0].co[:3], (1, 0, 0))
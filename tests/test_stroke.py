@@ -0,0 +1,101 @@
+"""The stroke grows by whole splines and redraws in bounded time"""
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+from blender_stubs import Event
+
+import InteractiveDraw as idt
+
+OPERATORS = stubs.drawOperators(idt)
+STROKE = OPERATORS['curve.idt_draw_stroke']
+
+def zigzag(corners, x=40, y=360):
+    """Region coordinates turning sharply at every corner, each one kept"""
+    return [(x + 6 * i, y + (12 if i % 2 else -12)) for i in range(corners)]
+
+def startStroke(coords, **properties):
+    """Operator with the stroke dragged through coords, without a timer
+    tick since the press"""
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    operator = STROKE(**properties)
+    operator.invoke(context, Event('MOUSEMOVE', 'NOTHING', *coords[0]))
+    operator.modal(context, Event('MOUSEMOVE', 'NOTHING', *coords[0]))
+    operator.modal(context, Event('LEFTMOUSE', 'PRESS', *coords[0]))
+    for coord in coords[1:]:
+        operator.modal(context, Event('MOUSEMOVE', 'NOTHING', *coord))
+    return context, operator
+
+def splinePoints(spline):
+    return np.array([p.co[:3] for p in spline.points])
+
+def test_many_points_between_two_ticks():
+    context, operator = startStroke(zigzag(400))
+    count = operator._count
+    assert count > 2 * STROKE._chunk
+
+    # one tick has to make room for every point kept since the press
+    operator.modal(context, Event('TIMER'))
+
+    step = STROKE._chunk - 1
+    splines = context.scene.objects.active.data.splines
+    assert len(splines) == count // step + 1
+    assert all(len(spline.points) == STROKE._chunk for spline in splines)
+
+    # the chunks join up to the kept points followed by the cursor
+    joined = np.vstack([splinePoints(splines[0])] + [splinePoints(s)[1:] for s in splines[1:]])
+    kept = np.frombuffer(operator._stroke, count=3 * count).reshape(-1, 3)
+    assert np.allclose(joined[:count], kept)
+    assert np.allclose(joined[count:], operator._last_point)
+
+def test_full_chunks_are_not_rewritten():
+    context, operator = startStroke(zigzag(300))
+    operator.modal(context, Event('TIMER'))
+    splines = context.scene.objects.active.data.splines
+    frozen = [list(s.points._data['co']) for s in splines[:-1]]
+
+    operator.modal(context, Event('MOUSEMOVE', 'NOTHING', 900, 100))
+    operator.modal(context, Event('TIMER'))
+
+    assert [list(s.points._data['co']) for s in splines[:len(frozen)]] == frozen
+
+@pytest.mark.parametrize('use_overlay', [False, True])
+def test_finished_stroke_is_one_exact_spline(use_overlay):
+    coords = zigzag(400)
+    context, operator = startStroke(coords, use_overlay=use_overlay)
+    operator.modal(context, Event('TIMER'))
+    expected = operator.finalPoints()
+
+    assert operator.modal(context, Event('LEFTMOUSE', 'RELEASE', *coords[-1])) == {'FINISHED'}
+    splines = context.scene.objects.active.data.splines
+    assert len(splines) == 1
+    assert np.allclose(splinePoints(splines[0]), expected)
+
+def test_cancelled_stroke_drops_its_chunks():
+    context, operator = startStroke(zigzag(400))
+    operator.modal(context, Event('TIMER'))
+    curve = context.scene.objects.active.data
+
+    assert operator.modal(context, Event('ESC', 'PRESS')) == {'CANCELLED'}
+    assert len(curve.splines) == 1
+    assert len(curve.splines[0].points) == STROKE._chunk
+
+def test_overlay_redraw_cost_does_not_grow_with_the_stroke():
+    bgl = stubs.sys.modules['bgl']
+    step = STROKE._chunk - 1
+
+    for corners in (300, 1200):
+        context, operator = startStroke(zigzag(corners), use_overlay=True)
+        operator.modal(context, Event('TIMER'))
+        # the first redraw compiles the finished chunks
+        stubs.drawOverlays(context)
+
+        before = bgl.calls
+        stubs.drawOverlays(context)
+        assert not stubs.bpy.data.curves
+
+        # a call per finished chunk and at most a chunk of vertices, where
+        # walking the stroke would take a call per kept point
+        assert operator._count > corners // 2
+        assert bgl.calls - before <= operator._count // step + STROKE._chunk + 10
@@ -0,0 +1,129 @@
+"""Stages of building meshes: the background topology job, the mesh
+swap and the pool of unlinked shape objects"""
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+from blender_stubs import Event
+
+import InteractiveDraw as idt
+import InteractiveDrawShapes as shapes
+
+OPERATORS = stubs.drawOperators(idt)
+
+def meshCounts(mesh):
+    return len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+
+@pytest.mark.parametrize('kind,segments', [('PLANE', 0), ('CUBE', 0), ('CYLINDER', 12), ('GRID', (3, 2))])
+def test_background_job_fills_a_mesh(kind, segments):
+    stubs.reset()
+    future = idt.submitJob(shapes.shapeMeshArrays, kind, segments)
+    mesh = stubs.bpy.data.meshes.new(kind.title())
+    idt.fillMesh(mesh, future.result(timeout=10))
+
+    faces = shapes.shapeFaces(kind, segments)
+    assert meshCounts(mesh) == (shapes.shapePointCount(kind, segments),
+                                sum(len(f) for f in faces), len(faces))
+    assert mesh.updates == 1
+
+    loop_start = [0] * len(mesh.polygons)
+    mesh.polygons.foreach_get("loop_start", loop_start)
+    assert loop_start == list(np.cumsum([0] + [len(f) for f in faces])[:-1])
+
+def test_topology_job_is_reused_until_the_topology_changes():
+    # invoke() imports the helpers before anything asks for a topology
+    idt.importHelpers()
+    operator = OPERATORS['mesh.idt_draw_grid']()
+    job = operator.topology()
+    assert operator.topology() is job
+
+    operator.x_subdivisions = 4
+    assert operator.topology() is not job
+
+def test_replaced_topology_jobs_are_cancelled():
+    import threading
+    idt.importHelpers()
+    operator = OPERATORS['mesh.idt_draw_grid']()
+
+    # hold the worker so the jobs queue up like fast wheel ticks do
+    release = threading.Event()
+    busy = idt.submitJob(release.wait, 10)
+    try:
+        jobs = []
+        for subdivisions in (4, 5, 6):
+            operator.x_subdivisions = subdivisions
+            jobs.append(operator.topology())
+    finally:
+        release.set()
+
+    assert all(job.cancelled() for job in jobs[:-1])
+    assert busy.result(timeout=10)
+    assert len(jobs[-1].result(timeout=10)[0]) == 3 * 7 * 11
+
+def test_wheel_swaps_the_mesh_once_the_job_is_done():
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    operator = OPERATORS['mesh.idt_draw_grid']()
+    operator.invoke(context, Event('MOUSEMOVE', 'NOTHING', 600, 300))
+    for event in stubs.clickStream([(600, 300)]) + stubs.moveTo((600, 300), (700, 400), 4):
+        operator.modal(context, event)
+    old = operator._mesh_data
+
+    assert operator.modal(context, Event('WHEELUPMOUSE', ctrl=True)) == {'RUNNING_MODAL'}
+    assert operator._swap
+    # the old mesh does not fit the new points, they wait for the swap
+    assert operator._mesh_data is old
+
+    operator._topology.result(timeout=10)
+    operator.modal(context, Event('TIMER'))
+    assert not operator._swap
+    assert operator._mesh.data is operator._mesh_data is not old
+    assert len(operator._mesh_data.vertices) == 12 * 11
+    assert old.name not in stubs.bpy.data.meshes._items
+
+def test_finishing_swaps_a_pending_mesh():
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    operator = OPERATORS['mesh.idt_draw_grid']()
+    operator.invoke(context, Event('MOUSEMOVE', 'NOTHING', 600, 300))
+    events = stubs.clickStream([(600, 300), (700, 400)])
+
+    for event in events[:-1]:
+        operator.modal(context, event)
+    operator.modal(context, Event('WHEELDOWNMOUSE', shift=True))
+
+    assert operator.modal(context, events[-1]) == {'FINISHED'}
+    assert len(context.scene.objects.active.data.vertices) == 11 * 10
+
+def test_cancelled_object_is_pooled_and_reused():
+    stubs.reset()
+    context = stubs.Context()
+    cls = OPERATORS['mesh.idt_draw_plane']
+    cancel = stubs.clickStream([(600, 300)]) + [Event('ESC', 'PRESS')]
+
+    assert stubs.replay(cls(), context, cancel)[0] == {'CANCELLED'}
+    pooled = stubs.bpy.data.objects['Plane']
+    assert pooled.users == 0
+    assert idt.IDT_draw_session.get(context).pooled(('PLANE', 0)) == 1
+
+    result, count = stubs.replay(cls(), context, stubs.clickStream([(600, 300), (700, 400)]))
+    assert result == {'FINISHED'}
+    assert context.scene.objects.active is pooled
+
+def test_grid_moves_rewrite_one_buffer():
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    operator = OPERATORS['mesh.idt_draw_grid']()
+    operator.invoke(context, Event('MOUSEMOVE', 'NOTHING', 600, 300))
+    for event in stubs.clickStream([(600, 300)]) + stubs.moveTo((600, 300), (650, 350), 4):
+        operator.modal(context, event)
+    buffer = operator._buffer
+
+    for event in stubs.moveTo((650, 350), (700, 400), 8):
+        operator.modal(context, event)
+    assert operator._buffer is buffer
+
+    co = [0.0] * (3 * len(operator._mesh_data.vertices))
+    operator._mesh_data.vertices.foreach_get("co", co)
+    assert np.allclose(co, buffer)
+    assert np.allclose(buffer.reshape(-1, 3)[-1], operator._last_point, atol=1e-5)
@@ -0,0 +1,66 @@
+"""A continuous draw pushes one undo step and a constant amount of memory per shape"""
+import gc
+import tracemalloc
+
+import pytest
+
+import blender_stubs as stubs
+from blender_stubs import Event
+
+import InteractiveDraw as idt
+
+OPERATORS = stubs.drawOperators(idt)
+
+COORDS = [(600, 300), (700, 420), (650, 500), (560, 450)]
+
+def continuousDraw(name, shapes, measure_every):
+    """Draw shapes shapes in one continuous draw, returns the undo steps
+    and the traced memory after every measure_every shapes"""
+    stubs.reset()
+    context = stubs.Context(stubs.topView())
+    cls = OPERATORS[name]
+    operator = cls(use_repeat=True)
+    shape = stubs.shapeStream(cls, COORDS)
+
+    memory = []
+    tracemalloc.start()
+    try:
+        assert operator.invoke(context, Event('MOUSEMOVE', 'NOTHING', *COORDS[0])) == {'RUNNING_MODAL'}
+        for i in range(shapes):
+            for event in shape:
+                assert operator.modal(context, event) == {'RUNNING_MODAL'}
+            if (i + 1) % measure_every == 0:
+                gc.collect()
+                memory.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+    assert operator.modal(context, Event('ESC', 'PRESS')) == {'CANCELLED'}
+    return list(stubs.bpy.ops.ed.undo_push.steps), memory, context
+
+@pytest.mark.parametrize('name', ['curve.idt_draw_line', 'curve.idt_draw_circle',
+                                  'curve.idt_draw_polygon', 'curve.idt_draw_stroke'])
+def test_one_undo_step_per_shape(name):
+    steps, memory, context = continuousDraw(name, 12, 4)
+
+    assert steps == [OPERATORS[name].bl_label] * 12
+    # the open shape is dropped, the finished ones stay
+    assert len(context.scene.objects.active.data.splines) == 12
+
+@pytest.mark.parametrize('name', ['curve.idt_draw_line', 'curve.idt_draw_polygon'])
+def test_memory_per_shape_is_constant(name):
+    steps, memory, context = continuousDraw(name, 60, 20)
+
+    # every shape adds one spline, nothing else may pile up
+    first, second = memory[1] - memory[0], memory[2] - memory[1]
+    assert second <= first * 1.5 + 4096
+
+def test_single_shape_leaves_the_undo_step_to_blender():
+    stubs.reset()
+    context = stubs.Context()
+    result, count = stubs.replay(OPERATORS['curve.idt_draw_line'](), context, stubs.clickStream(COORDS[:2]))
+
+    # REGISTER and UNDO make Blender push the step of a finished operator
+    assert result == {'FINISHED'}
+    assert 'UNDO' in OPERATORS['curve.idt_draw_line'].bl_options
+    assert stubs.bpy.ops.ed.undo_push.steps == []
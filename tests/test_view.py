@@ -0,0 +1,49 @@
+"""IDT_view_projection projects like view3d_utils"""
+import numpy as np
+import pytest
+
+import blender_stubs as stubs
+from bpy_extras import view3d_utils
+
+import InteractiveDraw as idt
+
+VIEWS = [stubs.perspectiveView, stubs.topView, stubs.frontView]
+COORDS = [(0, 0), (640, 360), (1279, 719), (100, 600), (900, 50)]
+
+@pytest.mark.parametrize('view', VIEWS)
+def test_ray_matches_view3d_utils(view):
+    region, rv3d = stubs.Region(), view()
+    projection = idt.IDT_view_projection(region, rv3d)
+
+    for coord in COORDS:
+        origin, vector = projection.ray(coord)
+        assert np.allclose(origin, view3d_utils.region_2d_to_origin_3d(region, rv3d, coord))
+        assert np.allclose(vector, view3d_utils.region_2d_to_vector_3d(region, rv3d, coord))
+
+def test_matches_only_the_same_view():
+    region, rv3d = stubs.Region(), stubs.perspectiveView()
+    projection = idt.IDT_view_projection(region, rv3d)
+
+    assert projection.matches(region, rv3d)
+    assert not projection.matches(stubs.Region(800, 600), rv3d)
+    assert not projection.matches(region, stubs.topView())
+
+@pytest.mark.parametrize('view', [stubs.topView, stubs.frontView])
+def test_plane_affine_matches_ray(view):
+    from mathutils import Vector
+
+    region, rv3d = stubs.Region(), view()
+    projection = idt.IDT_view_projection(region, rv3d)
+    o, N = Vector((0.5, -1, 2)), Vector((0.3, -0.4, 1)).normalized()
+    A, B, C = projection.planeAffine(o, N)
+
+    for coord in COORDS:
+        origin, vector = projection.ray(coord)
+        expected = idt.rayPlaneIntersection(origin, vector, o, N)
+        assert np.allclose(A * coord[0] + B * coord[1] + C, expected)
+
+def test_plane_affine_of_a_plane_along_the_view():
+    from mathutils import Vector
+
+    projection = idt.IDT_view_projection(stubs.Region(), stubs.topView())
+    assert projection.planeAffine(Vector((0, 0, 0)), Vector((1, 0, 0))) is None